@@ -1,25 +1,51 @@
 """AI-powered insights API routes."""
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime, date
+from sqlalchemy import select, func, update
+from sqlalchemy.orm import aliased
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional, Dict
+from datetime import date, datetime, timedelta
+import asyncio
 import logging
+import math
 
-from database import get_db
+from config import settings
+from database import get_db, AsyncSessionLocal
+from services.cache import cache
+from services.llm.batch_openai import OpenAIBatchCategorizer
 from services.llm.factory import get_llm_provider
+from services.llm.openai_provider import OpenAIProvider
 from models.transaction import Transaction
 from models.ai_insight import AIInsight
-from models.account import Account
+from models.llm_batch import LLMBatch
 from models.user import User
 from schemas.ai_insight import AIInsightRead
 from api.routes.auth import get_current_user
+from api.routes.analytics import invalidate_analytics_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/ai", tags=["ai"])
 
+# Number of transactions packed into a single LLM categorization request;
+# small enough that local models keep the numbered list within context
+CATEGORIZE_BATCH_SIZE = 25
+
+# Maximum number of concurrent LLM calls during bulk categorization
+CATEGORIZE_CONCURRENCY = 8
+
+# Bulk categorization claims older than this are presumed abandoned by a
+# crashed job and may be claimed again
+CATEGORIZE_CLAIM_TIMEOUT = timedelta(hours=1)
+
+# Size of the pre-aggregated context sent to the LLM for spending analysis
+MAX_ANALYZE_ROWS = 5000
+SUMMARY_TOP_K = 20
+SAMPLE_LARGEST = 10
+SAMPLE_OUTLIERS = 10
+
 
 class AnalyzeRequest(BaseModel):
     """Request for AI analysis."""
@@ -33,11 +59,197 @@ class AnalyzeRequest(BaseModel):
 class AnalyzeResponse(BaseModel):
     """Response for AI analysis."""
 
+    model_config = ConfigDict(protected_namespaces=())
+
     insight: str
     insight_id: str
     model_used: str
 
 
+async def _summarize_transactions(
+    db: AsyncSession, conditions: list
+) -> Optional[tuple[str, List[Dict]]]:
+    """
+    Build a compact summary of the matching transactions for the LLM prompt.
+
+    Considers at most MAX_ANALYZE_ROWS of the most recent matching transactions.
+    Returns a text block of top categories, merchants and days plus a sample
+    of the largest and most unusual transactions, or None if nothing matches.
+    """
+    # Bound the work per request to the most recent matching transactions
+    recent = aliased(
+        Transaction,
+        select(Transaction)
+        .where(*conditions)
+        .order_by(Transaction.date.desc())
+        .limit(MAX_ANALYZE_ROWS)
+        .subquery(),
+    )
+
+    result = await db.execute(
+        select(
+            func.count(recent.id),
+            func.sum(recent.amount),
+            func.avg(recent.amount),
+            func.avg(recent.amount * recent.amount),
+        )
+    )
+    count, total, mean, mean_sq = result.one()
+
+    if not count:
+        return None
+
+    lines = [f"Summary: {count} transactions totalling ${total:.2f}."]
+
+    groupings = [
+        ("Top categories", func.coalesce(recent.category, "Uncategorized")),
+        ("Top merchants", func.coalesce(recent.merchant_name, "Unknown")),
+        ("Highest spending days", recent.date),
+    ]
+    for title, key in groupings:
+        amount = func.sum(recent.amount).label("amount")
+        result = await db.execute(
+            select(key, amount, func.count(recent.id))
+            .group_by(key)
+            .order_by(amount.desc())
+            .limit(SUMMARY_TOP_K)
+        )
+        lines.append(f"\n{title}:")
+        lines.extend(
+            f"- {name}: ${value:.2f} ({n} transactions)" for name, value, n in result.all()
+        )
+
+    lines.append("\nThe transactions below are the largest and most unusual in the period.")
+
+    # Largest transactions, plus outliers more than three standard deviations above the mean
+    result = await db.execute(
+        select(recent)
+        .order_by(recent.amount.desc())
+        .limit(SAMPLE_LARGEST)
+    )
+    sample = list(result.scalars().all())
+
+    stddev = math.sqrt(max(mean_sq - mean * mean, 0.0))
+    result = await db.execute(
+        select(recent)
+        .where(recent.amount > mean + 3 * stddev)
+        .where(recent.id.not_in([txn.id for txn in sample]))
+        .order_by(recent.amount.desc())
+        .limit(SAMPLE_OUTLIERS)
+    )
+    sample.extend(result.scalars().all())
+
+    # Convert to dict format for LLM
+    txn_data = [
+        {
+            "date": str(txn.date),
+            "merchant_name": txn.merchant_name,
+            "amount": txn.amount,
+            "category": txn.category,
+            "description": txn.description,
+        }
+        for txn in sample
+    ]
+
+    return "\n".join(lines), txn_data
+
+
+def _analysis_cache_key(request: AnalyzeRequest, user_id: str) -> str:
+    """Cache key identifying an analysis request for a user."""
+    return cache.make_key(
+        "ai_insight",
+        user_id,
+        request.insight_type,
+        request.date_range_start,
+        request.date_range_end,
+        sorted(request.account_ids) if request.account_ids else None,
+    )
+
+
+async def _prepare_analysis(
+    request: AnalyzeRequest, db: AsyncSession, user_id: str
+) -> tuple[Optional[date], Optional[date], str, List[Dict]]:
+    """
+    Resolve the date range and build the LLM prompt and transaction sample.
+
+    Raises:
+        HTTPException: 404 if no transactions match the request
+    """
+    # Parse dates
+    start_date = (
+        date.fromisoformat(request.date_range_start)
+        if request.date_range_start
+        else None
+    )
+    end_date = (
+        date.fromisoformat(request.date_range_end)
+        if request.date_range_end
+        else None
+    )
+
+    # Filter by user
+    conditions = [Transaction.user_id == user_id]
+    if start_date:
+        conditions.append(Transaction.date >= start_date)
+    if end_date:
+        conditions.append(Transaction.date <= end_date)
+    if request.account_ids:
+        conditions.append(Transaction.account_id.in_(request.account_ids))
+
+    # Pre-aggregate in SQL so the prompt stays small regardless of range
+    context = await _summarize_transactions(db, conditions)
+
+    if context is None:
+        raise HTTPException(
+            status_code=404, detail="No transactions found for the specified criteria"
+        )
+
+    summary_text, txn_data = context
+
+    # Generate insight based on type
+    if request.insight_type == "spending_analysis":
+        prompt = """Analyze these transactions and provide:
+1. Top 3 spending categories with amounts
+2. Any unusual spending patterns or anomalies
+3. One actionable recommendation to reduce spending"""
+    elif request.insight_type == "category_breakdown":
+        prompt = "Categorize and summarize spending by category. Provide a clear breakdown with percentages."
+    elif request.insight_type == "reimbursement_analysis":
+        prompt = "Identify any transactions that might be reimbursements or refunds. List them with confidence scores."
+    else:
+        prompt = "Provide a comprehensive spending analysis."
+
+    return start_date, end_date, f"{prompt}\n\n{summary_text}", txn_data
+
+
+async def _save_insight(
+    db: AsyncSession,
+    user_id: str,
+    insight_type: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    content: str,
+    model_name: str,
+) -> AIInsight:
+    """
+    Persist a generated insight in a single round-trip.
+
+    The primary key is generated client-side, so the id is known without
+    refreshing the row after commit.
+    """
+    ai_insight = AIInsight(
+        user_id=user_id,
+        insight_type=insight_type,
+        date_range_start=start_date,
+        date_range_end=end_date,
+        content=content,
+        model_used=model_name,
+    )
+    db.add(ai_insight)
+    await db.commit()
+    return ai_insight
+
+
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_spending(
     request: AnalyzeRequest,
@@ -50,92 +262,43 @@ async def analyze_spending(
     Generates insights about spending patterns, categories, and anomalies.
     """
     try:
-        # Parse dates
-        start_date = (
-            datetime.fromisoformat(request.date_range_start).date()
-            if request.date_range_start
-            else None
-        )
-        end_date = (
-            datetime.fromisoformat(request.date_range_end).date()
-            if request.date_range_end
-            else None
-        )
-
-        # Build query with user filter via Account join
-        query = (
-            select(Transaction)
-            .join(Account, Transaction.account_id == Account.id)
-            .where(Account.user_id == current_user.id)
+        # Return a cached insight for an identical request without calling the LLM
+        cache_key = _analysis_cache_key(request, current_user.id)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return AnalyzeResponse(**cached)
+
+        start_date, end_date, prompt, txn_data = await _prepare_analysis(
+            request, db, current_user.id
         )
 
-        if start_date:
-            query = query.where(Transaction.date >= start_date)
-        if end_date:
-            query = query.where(Transaction.date <= end_date)
-        if request.account_ids:
-            query = query.where(Transaction.account_id.in_(request.account_ids))
-
-        # Fetch transactions
-        result = await db.execute(query)
-        transactions = result.scalars().all()
-
-        if not transactions:
-            raise HTTPException(
-                status_code=404, detail="No transactions found for the specified criteria"
-            )
-
-        # Convert to dict format for LLM
-        txn_data = [
-            {
-                "date": str(txn.date),
-                "merchant_name": txn.merchant_name,
-                "amount": txn.amount,
-                "category": txn.category,
-                "description": txn.description,
-            }
-            for txn in transactions
-        ]
-
         # Get LLM provider
         llm = get_llm_provider()
 
-        # Generate insight based on type
-        if request.insight_type == "spending_analysis":
-            prompt = """Analyze these transactions and provide:
-1. Top 3 spending categories with amounts
-2. Any unusual spending patterns or anomalies
-3. One actionable recommendation to reduce spending"""
-        elif request.insight_type == "category_breakdown":
-            prompt = "Categorize and summarize spending by category. Provide a clear breakdown with percentages."
-        elif request.insight_type == "reimbursement_analysis":
-            prompt = "Identify any transactions that might be reimbursements or refunds. List them with confidence scores."
-        else:
-            prompt = "Provide a comprehensive spending analysis."
-
         insight_text = await llm.generate_insight(prompt, txn_data)
 
         # Save insight to database
         model_name = (
             llm.model if hasattr(llm, "model") else llm.__class__.__name__
         )
-        ai_insight = AIInsight(
-            user_id=current_user.id,
-            insight_type=request.insight_type,
-            date_range_start=start_date,
-            date_range_end=end_date,
-            content=insight_text,
-            model_used=model_name,
+        ai_insight = await _save_insight(
+            db,
+            current_user.id,
+            request.insight_type,
+            start_date,
+            end_date,
+            insight_text,
+            model_name,
         )
-        db.add(ai_insight)
-        await db.commit()
-        await db.refresh(ai_insight)
 
-        return AnalyzeResponse(
+        response = AnalyzeResponse(
             insight=insight_text,
             insight_id=ai_insight.id,
             model_used=model_name,
         )
+        await cache.set(cache_key, response.model_dump(), settings.AI_INSIGHT_CACHE_TTL)
+
+        return response
 
     except HTTPException:
         raise
@@ -144,6 +307,82 @@ async def analyze_spending(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/analyze/stream")
+async def analyze_spending_stream(
+    request: AnalyzeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Stream AI analysis for the current user as plain text while it is generated.
+    The full insight is saved once the stream completes.
+    """
+    try:
+        cache_key = _analysis_cache_key(request, current_user.id)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return StreamingResponse(
+                iter([cached["insight"]]),
+                media_type="text/plain",
+                headers={"X-Model-Used": cached["model_used"]},
+            )
+
+        start_date, end_date, prompt, txn_data = await _prepare_analysis(
+            request, db, current_user.id
+        )
+
+        # Get LLM provider
+        llm = get_llm_provider()
+        model_name = (
+            llm.model if hasattr(llm, "model") else llm.__class__.__name__
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error analyzing spending: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def generate():
+        chunks = []
+        try:
+            async for chunk in llm.stream_insight(prompt, txn_data):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            # Headers are already sent, so report the failure in the body and
+            # don't keep the partial insight
+            logger.error(f"Error streaming insight: {e}")
+            yield f"Error generating insight: {str(e)}"
+            return
+
+        # The request session is closed once streaming starts, so save with a fresh one
+        insight_text = "".join(chunks)
+        try:
+            async with AsyncSessionLocal() as session:
+                ai_insight = await _save_insight(
+                    session,
+                    current_user.id,
+                    request.insight_type,
+                    start_date,
+                    end_date,
+                    insight_text,
+                    model_name,
+                )
+            response = AnalyzeResponse(
+                insight=insight_text,
+                insight_id=ai_insight.id,
+                model_used=model_name,
+            )
+            await cache.set(cache_key, response.model_dump(), settings.AI_INSIGHT_CACHE_TTL)
+        except Exception as e:
+            logger.error(f"Error saving streamed insight: {e}")
+
+    return StreamingResponse(
+        generate(), media_type="text/plain", headers={"X-Model-Used": model_name}
+    )
+
+
 @router.get("/insights", response_model=List[AIInsightRead])
 async def get_insights(
     limit: int = 10,
@@ -187,12 +426,11 @@ async def categorize_transaction(
     Updates the ai_category field.
     """
     try:
-        # Get transaction (ensure it belongs to current user via Account join)
+        # Get transaction (ensure it belongs to current user)
         result = await db.execute(
             select(Transaction)
-            .join(Account, Transaction.account_id == Account.id)
             .where(Transaction.id == transaction_id)
-            .where(Account.user_id == current_user.id)
+            .where(Transaction.user_id == current_user.id)
         )
         transaction = result.scalar_one_or_none()
 
@@ -213,6 +451,7 @@ async def categorize_transaction(
         # Update transaction
         transaction.ai_category = category
         await db.commit()
+        await invalidate_analytics_cache(current_user.id)
 
         return {"transaction_id": transaction_id, "ai_category": category}
 
@@ -235,27 +474,53 @@ async def bulk_categorize_transactions(
     Runs in background to avoid timeout.
     """
     try:
-        # Get uncategorized transactions (filter by user_id via Account join)
-        result = await db.execute(
-            select(Transaction)
-            .join(Account, Transaction.account_id == Account.id)
-            .where(Transaction.ai_category == None)
-            .where(Account.user_id == current_user.id)
+        # Claim uncategorized transactions for the user and commit the claim
+        # before handing off, so a concurrent request picks different rows.
+        # SKIP LOCKED lets that request pass over rows being claimed right now.
+        now = datetime.utcnow()
+        claimable = (
+            select(Transaction.id)
+            .where(Transaction.ai_category.is_(None))
+            .where(
+                Transaction.categorization_claimed_at.is_(None)
+                | (Transaction.categorization_claimed_at < now - CATEGORIZE_CLAIM_TIMEOUT)
+            )
+            .where(Transaction.user_id == current_user.id)
+            .order_by(Transaction.id)
             .limit(limit)
+            .with_for_update(skip_locked=True)
         )
-        transactions = result.scalars().all()
+        result = await db.execute(
+            update(Transaction)
+            .where(Transaction.id.in_(claimable.scalar_subquery()))
+            .values(categorization_claimed_at=now)
+            .returning(Transaction.id)
+            .execution_options(synchronize_session=False)
+        )
+        transaction_ids = result.scalars().all()
+        await db.commit()
 
-        if not transactions:
+        if not transaction_ids:
             return {"message": "No uncategorized transactions found", "count": 0}
 
-        # Run in background
+        # Hand off to a Celery worker when configured, otherwise run in-process
+        if settings.CELERY_ENABLED:
+            from worker import categorize_transactions_task
+
+            job = categorize_transactions_task.delay(list(transaction_ids), current_user.id)
+            return {
+                "message": "Bulk categorization queued",
+                "count": len(transaction_ids),
+                "job_id": job.id,
+            }
+
         background_tasks.add_task(
-            categorize_transactions_background, [txn.id for txn in transactions], current_user.id, db
+            categorize_transactions_background, list(transaction_ids), current_user.id
         )
 
         return {
             "message": "Bulk categorization started",
-            "count": len(transactions),
+            "count": len(transaction_ids),
         }
 
     except Exception as e:
@@ -263,43 +528,209 @@ async def bulk_categorize_transactions(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/bulk-categorize/batch")
+async def submit_categorization_batch(
+    limit: int = 5000,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Submit uncategorized transactions to OpenAI's Batch API for the current user.
+    Results arrive within 24 hours; collect them with the ingest endpoint.
+    """
+    try:
+        llm = get_llm_provider()
+        if not isinstance(llm, OpenAIProvider) or not llm.supports_batch_api:
+            raise HTTPException(
+                status_code=400, detail="Batch categorization requires the OpenAI provider"
+            )
+
+        result = await db.execute(
+            select(
+                Transaction.id,
+                Transaction.merchant_name,
+                Transaction.amount,
+                Transaction.description,
+            )
+            .where(Transaction.ai_category.is_(None))
+            .where(Transaction.user_id == current_user.id)
+            .order_by(Transaction.id)
+            .limit(limit)
+        )
+        transactions = [row._asdict() for row in result.all()]
+
+        if not transactions:
+            return {"message": "No uncategorized transactions found", "count": 0}
+
+        batch_id = await OpenAIBatchCategorizer(llm).submit(transactions)
+
+        db.add(
+            LLMBatch(
+                user_id=current_user.id,
+                batch_id=batch_id,
+                transaction_count=len(transactions),
+            )
+        )
+        await db.commit()
+
+        return {
+            "message": "Batch categorization submitted",
+            "count": len(transactions),
+            "batch_id": batch_id,
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error submitting categorization batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/bulk-categorize/batch/{batch_id}/ingest")
+async def ingest_categorization_batch(
+    batch_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Poll a submitted batch and, once it has completed, store its categories.
+    Safe to call repeatedly; clients poll until the status is 'ingested'.
+    """
+    try:
+        result = await db.execute(
+            select(LLMBatch).where(
+                LLMBatch.batch_id == batch_id, LLMBatch.user_id == current_user.id
+            )
+        )
+        llm_batch = result.scalar_one_or_none()
+
+        if not llm_batch:
+            raise HTTPException(status_code=404, detail="Batch not found")
+
+        if llm_batch.status == "ingested":
+            return {"status": llm_batch.status, "count": 0}
+
+        llm = get_llm_provider()
+        if not isinstance(llm, OpenAIProvider) or not llm.supports_batch_api:
+            raise HTTPException(
+                status_code=400, detail="Batch categorization requires the OpenAI provider"
+            )
+
+        status, categories = await OpenAIBatchCategorizer(llm).fetch_results(batch_id)
+        if categories is None:
+            return {"status": status, "count": 0}
+
+        # Only update rows the user owns and that are still uncategorized
+        result = await db.execute(
+            select(Transaction.id)
+            .where(Transaction.id.in_(list(categories)))
+            .where(Transaction.user_id == current_user.id)
+            .where(Transaction.ai_category.is_(None))
+        )
+        updates = [
+            {"id": transaction_id, "ai_category": categories[transaction_id]}
+            for transaction_id in result.scalars()
+        ]
+        if updates:
+            await db.execute(update(Transaction), updates)
+
+        llm_batch.status = "ingested"
+        await db.commit()
+        await invalidate_analytics_cache(current_user.id)
+
+        return {"status": llm_batch.status, "count": len(updates)}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ingesting categorization batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 async def categorize_transactions_background(
     transaction_ids: List[str],
     user_id: str,
-    db: AsyncSession,
 ):
-    """Background task to categorize transactions."""
+    """
+    Background task to categorize transactions.
+
+    Uses its own short-lived sessions for the read and the write, so no
+    database connection is held while waiting on the LLM.
+    """
     try:
         llm = get_llm_provider()
 
-        for txn_id in transaction_ids:
+        # Fetch all transactions in one round-trip (filter by user_id)
+        async with AsyncSessionLocal() as db:
             result = await db.execute(
-                select(Transaction)
-                .join(Account, Transaction.account_id == Account.id)
-                .where(Transaction.id == txn_id)
-                .where(Account.user_id == user_id)
+                select(
+                    Transaction.id,
+                    Transaction.merchant_name,
+                    Transaction.amount,
+                    Transaction.description,
+                )
+                .where(Transaction.id.in_(transaction_ids))
+                .where(Transaction.user_id == user_id)
+            )
+            transactions = result.all()
+
+        semaphore = asyncio.Semaphore(CATEGORIZE_CONCURRENCY)
+        updates = []
+
+        async def categorize(batch: list):
+            txn_data = [
+                {
+                    "merchant_name": merchant_name,
+                    "amount": amount,
+                    "description": description,
+                }
+                for _, merchant_name, amount, description in batch
+            ]
+            async with semaphore:
+                try:
+                    categories = await llm.categorize_transactions_batch(txn_data)
+                except Exception as e:
+                    logger.error(f"Error categorizing batch of {len(batch)} transactions: {e}")
+                    return
+            updates.extend(
+                {"id": row.id, "ai_category": category}
+                for row, category in zip(batch, categories)
             )
-            transaction = result.scalar_one_or_none()
-
-            if not transaction:
-                continue
 
-            txn_data = {
-                "merchant_name": transaction.merchant_name,
-                "amount": transaction.amount,
-                "description": transaction.description,
-            }
+        await asyncio.gather(
+            *(
+                categorize(transactions[i : i + CATEGORIZE_BATCH_SIZE])
+                for i in range(0, len(transactions), CATEGORIZE_BATCH_SIZE)
+            )
+        )
 
-            try:
-                category = await llm.categorize_transaction(txn_data)
-                transaction.ai_category = category
-            except Exception as e:
-                logger.error(f"Error categorizing transaction {txn_id}: {e}")
-                continue
+        # Write all categories back in one bulk UPDATE by primary key
+        if updates:
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(Transaction), updates)
+                await db.commit()
+            await invalidate_analytics_cache(user_id)
 
-        await db.commit()
-        logger.info(f"Categorized {len(transaction_ids)} transactions")
+        logger.info(f"Categorized {len(updates)} transactions")
 
     except Exception as e:
         logger.error(f"Background categorization failed: {e}")
-        await db.rollback()
+
+    finally:
+        await _release_claims(transaction_ids)
+
+
+async def _release_claims(transaction_ids: List[str]):
+    """Release claimed transactions left uncategorized so a later request retries them."""
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Transaction)
+                .where(Transaction.id.in_(transaction_ids))
+                .where(Transaction.ai_category.is_(None))
+                .values(categorization_claimed_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Error releasing categorization claims: {e}")
@@ -1,14 +1,15 @@
 """Analytics API routes for spending data."""
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case, distinct, lambda_stmt
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 from pydantic import BaseModel
-from typing import List, Optional, Dict
-from datetime import datetime, date, timedelta
-from collections import defaultdict
+from typing import List, Optional
+from datetime import date
 import logging
 
 from database import get_db
+from services.cache import cache
 from models.transaction import Transaction
 from models.account import Account
 from models.user import User
@@ -18,6 +19,71 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
+# Dashboards re-poll these endpoints, so cache responses briefly per user
+ANALYTICS_CACHE_TTL = 45  # seconds
+
+
+async def _analytics_cache_key(endpoint: str, user_id: str, *params) -> str:
+    """
+    Cache key for an analytics response.
+
+    Includes the user's analytics version so invalidate_analytics_cache
+    makes every previously cached response unreachable at once.
+    """
+    version = await cache.get(f"analytics_version:{user_id}") or 0
+    return cache.make_key(f"analytics:{endpoint}", user_id, version, *params)
+
+
+async def invalidate_analytics_cache(user_id: str) -> None:
+    """Drop cached analytics for a user after their transactions change."""
+    await cache.incr(f"analytics_version:{user_id}")
+
+
+def _parse_range(
+    start_date: Optional[str], end_date: Optional[str]
+) -> tuple[Optional[date], Optional[date]]:
+    """Parse optional ISO start/end date query parameters."""
+    return (
+        date.fromisoformat(start_date) if start_date else None,
+        date.fromisoformat(end_date) if end_date else None,
+    )
+
+
+def _filter_date_range(
+    query: StatementLambdaElement,
+    range_start: Optional[date],
+    range_end: Optional[date],
+) -> StatementLambdaElement:
+    """Add optional date bounds to a cached lambda statement."""
+    if range_start:
+        query += lambda s: s.where(Transaction.date >= range_start)
+    if range_end:
+        query += lambda s: s.where(Transaction.date <= range_end)
+    return query
+
+
+def _date_bucket(granularity: str, dialect_name: str):
+    """
+    Build a SQL expression that maps Transaction.date to its reporting bucket.
+
+    Buckets are rendered as strings: 'YYYY-MM-DD' for daily, the Monday
+    starting the week for weekly, and 'YYYY-MM' for monthly.
+    """
+    if dialect_name == "postgresql":
+        if granularity == "daily":
+            return func.to_char(Transaction.date, "YYYY-MM-DD")
+        elif granularity == "weekly":
+            return func.to_char(func.date_trunc("week", Transaction.date), "YYYY-MM-DD")
+        return func.to_char(func.date_trunc("month", Transaction.date), "YYYY-MM")
+
+    # SQLite fallback
+    if granularity == "daily":
+        return func.date(Transaction.date)
+    elif granularity == "weekly":
+        # Step back six days, then forward to the next Monday (inclusive)
+        return func.date(Transaction.date, "-6 days", "weekday 1")
+    return func.strftime("%Y-%m", Transaction.date)
+
 
 class SpendingByCard(BaseModel):
     """Spending aggregated by card/account."""
@@ -57,7 +123,11 @@ class ReimbursementItem(BaseModel):
     confidence: Optional[float] = None
 
 
-@router.get("/spending-by-card", response_model=List[SpendingByCard])
+@router.get(
+    "/spending-by-card",
+    response_model=None,
+    responses={200: {"model": List[SpendingByCard]}},
+)
 async def get_spending_by_card(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -69,52 +139,46 @@ async def get_spending_by_card(
     Optionally filter by date range.
     """
     try:
-        # Build query with user filter via Account join
-        query = (
-            select(
-                Transaction.account_id,
+        cache_key = await _analytics_cache_key(
+            "get_spending_by_card", current_user.id, start_date, end_date
+        )
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Build query with account details joined in, filtered by user
+        user_id = current_user.id
+        query = lambda_stmt(
+            lambda: select(
+                Account.id,
+                Account.account_name,
+                Account.institution_name,
                 func.sum(Transaction.amount).label("total_spent"),
                 func.count(Transaction.id).label("transaction_count"),
             )
-            .join(Account, Transaction.account_id == Account.id)
-            .where(Transaction.account_id != None)
-            .where(Account.user_id == current_user.id)
-            .group_by(Transaction.account_id)
+            .join(Transaction, Transaction.account_id == Account.id)
+            .where(Account.user_id == user_id)
+            .group_by(Account.id, Account.account_name, Account.institution_name)
         )
 
         # Apply date filters
-        if start_date:
-            query = query.where(
-                Transaction.date >= datetime.fromisoformat(start_date).date()
-            )
-        if end_date:
-            query = query.where(
-                Transaction.date <= datetime.fromisoformat(end_date).date()
-            )
+        query = _filter_date_range(query, *_parse_range(start_date, end_date))
 
         result = await db.execute(query)
-        spending_data = result.all()
-
-        # Get account details (filter by user_id)
-        account_result = await db.execute(
-            select(Account).where(Account.user_id == current_user.id)
-        )
-        accounts = {acc.id: acc for acc in account_result.scalars()}
 
         # Format response
-        response = []
-        for account_id, total, count in spending_data:
-            account = accounts.get(account_id)
-            if account:
-                response.append(
-                    SpendingByCard(
-                        account_id=account_id,
-                        account_name=account.account_name,
-                        institution_name=account.institution_name,
-                        total_spent=float(total),
-                        transaction_count=count,
-                    )
-                )
+        response = [
+            {
+                "account_id": account_id,
+                "account_name": account_name,
+                "institution_name": institution_name,
+                "total_spent": float(total),
+                "transaction_count": count,
+            }
+            for account_id, account_name, institution_name, total, count in result.all()
+        ]
+
+        await cache.set(cache_key, response, ANALYTICS_CACHE_TTL)
 
         return response
 
@@ -123,7 +187,11 @@ async def get_spending_by_card(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/spending-over-time", response_model=List[SpendingOverTime])
+@router.get(
+    "/spending-over-time",
+    response_model=None,
+    responses={200: {"model": List[SpendingOverTime]}},
+)
 async def get_spending_over_time(
     granularity: str = Query("monthly", regex="^(daily|weekly|monthly)$"),
     start_date: Optional[str] = Query(None),
@@ -137,51 +205,52 @@ async def get_spending_over_time(
     Returns aggregated data by day, week, or month.
     """
     try:
-        # Build query with user filter via Account join
-        query = select(Transaction).join(Account, Transaction.account_id == Account.id).where(Account.user_id == current_user.id)
+        cache_key = await _analytics_cache_key(
+            "get_spending_over_time", current_user.id, granularity, start_date, end_date, account_ids
+        )
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
 
-        # Apply filters
-        if start_date:
-            query = query.where(
-                Transaction.date >= datetime.fromisoformat(start_date).date()
-            )
-        if end_date:
-            query = query.where(
-                Transaction.date <= datetime.fromisoformat(end_date).date()
+        # Aggregate in the database, grouping on a granularity bucket
+        bucket = _date_bucket(granularity, db.bind.dialect.name).label("bucket")
+
+        # Build query filtered by the denormalized user_id
+        query = (
+            select(
+                bucket,
+                func.sum(Transaction.amount).label("amount"),
+                func.count(Transaction.id).label("transaction_count"),
             )
+            .where(Transaction.user_id == current_user.id)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+
+        # Apply filters
+        range_start, range_end = _parse_range(start_date, end_date)
+        if range_start:
+            query = query.where(Transaction.date >= range_start)
+        if range_end:
+            query = query.where(Transaction.date <= range_end)
         if account_ids:
             acc_list = [aid.strip() for aid in account_ids.split(",")]
             query = query.where(Transaction.account_id.in_(acc_list))
 
-        result = await db.execute(query.order_by(Transaction.date))
-        transactions = result.scalars().all()
-
-        # Aggregate by granularity
-        spending_dict: Dict[str, Dict] = defaultdict(lambda: {"amount": 0.0, "count": 0})
-
-        for txn in transactions:
-            if granularity == "daily":
-                key = str(txn.date)
-            elif granularity == "weekly":
-                # Get start of week (Monday)
-                start_of_week = txn.date - timedelta(days=txn.date.weekday())
-                key = str(start_of_week)
-            else:  # monthly
-                key = txn.date.strftime("%Y-%m")
-
-            spending_dict[key]["amount"] += txn.amount
-            spending_dict[key]["count"] += 1
+        result = await db.execute(query)
 
         # Format response
         response = [
-            SpendingOverTime(
-                date=date_key,
-                amount=data["amount"],
-                transaction_count=data["count"],
-            )
-            for date_key, data in sorted(spending_dict.items())
+            {
+                "date": str(date_key),
+                "amount": float(amount),
+                "transaction_count": count,
+            }
+            for date_key, amount, count in result.all()
         ]
 
+        await cache.set(cache_key, response, ANALYTICS_CACHE_TTL)
+
         return response
 
     except Exception as e:
@@ -189,7 +258,11 @@ async def get_spending_over_time(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/categories", response_model=List[CategorySpending])
+@router.get(
+    "/categories",
+    response_model=None,
+    responses={200: {"model": List[CategorySpending]}},
+)
 async def get_category_breakdown(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -202,31 +275,34 @@ async def get_category_breakdown(
     Can use either Plaid categories or AI-generated categories.
     """
     try:
+        cache_key = await _analytics_cache_key(
+            "get_category_breakdown", current_user.id, start_date, end_date, use_ai_category
+        )
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         # Determine which category field to use
         category_field = Transaction.ai_category if use_ai_category else Transaction.category
 
-        # Build query with user filter via Account join
+        # Build query filtered by the denormalized user_id
         query = (
             select(
                 category_field.label("category"),
                 func.sum(Transaction.amount).label("amount"),
                 func.count(Transaction.id).label("count"),
             )
-            .join(Account, Transaction.account_id == Account.id)
             .where(category_field != None)
-            .where(Account.user_id == current_user.id)
+            .where(Transaction.user_id == current_user.id)
             .group_by(category_field)
         )
 
         # Apply date filters
-        if start_date:
-            query = query.where(
-                Transaction.date >= datetime.fromisoformat(start_date).date()
-            )
-        if end_date:
-            query = query.where(
-                Transaction.date <= datetime.fromisoformat(end_date).date()
-            )
+        range_start, range_end = _parse_range(start_date, end_date)
+        if range_start:
+            query = query.where(Transaction.date >= range_start)
+        if range_end:
+            query = query.where(Transaction.date <= range_end)
 
         result = await db.execute(query)
         category_data = result.all()
@@ -236,19 +312,21 @@ async def get_category_breakdown(
 
         # Format response
         response = [
-            CategorySpending(
-                category=category or "Uncategorized",
-                amount=float(amount),
-                percentage=round((float(amount) / total_amount * 100), 2)
+            {
+                "category": category or "Uncategorized",
+                "amount": float(amount),
+                "percentage": round((float(amount) / total_amount * 100), 2)
                 if total_amount > 0
                 else 0.0,
-                transaction_count=count,
-            )
+                "transaction_count": count,
+            }
             for category, amount, count in category_data
         ]
 
         # Sort by amount descending
-        response.sort(key=lambda x: x.amount, reverse=True)
+        response.sort(key=lambda x: x["amount"], reverse=True)
+
+        await cache.set(cache_key, response, ANALYTICS_CACHE_TTL)
 
         return response
 
@@ -257,7 +335,11 @@ async def get_category_breakdown(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/reimbursements", response_model=List[ReimbursementItem])
+@router.get(
+    "/reimbursements",
+    response_model=None,
+    responses={200: {"model": List[ReimbursementItem]}},
+)
 async def get_reimbursements(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -269,37 +351,37 @@ async def get_reimbursements(
     Includes both manually marked and AI-detected reimbursements.
     """
     try:
-        # Build query with user filter via Account join
-        query = (
-            select(Transaction)
-            .join(Account, Transaction.account_id == Account.id)
+        # Build query filtered by the denormalized user_id
+        user_id = current_user.id
+        query = lambda_stmt(
+            lambda: select(
+                Transaction.id,
+                Transaction.date,
+                Transaction.merchant_name,
+                Transaction.amount,
+                Transaction.description,
+            )
             .where(Transaction.is_reimbursement == True)
-            .where(Account.user_id == current_user.id)
+            .where(Transaction.user_id == user_id)
         )
 
         # Apply date filters
-        if start_date:
-            query = query.where(
-                Transaction.date >= datetime.fromisoformat(start_date).date()
-            )
-        if end_date:
-            query = query.where(
-                Transaction.date <= datetime.fromisoformat(end_date).date()
-            )
+        query = _filter_date_range(query, *_parse_range(start_date, end_date))
 
-        result = await db.execute(query.order_by(Transaction.date.desc()))
-        reimbursements = result.scalars().all()
+        query += lambda s: s.order_by(Transaction.date.desc())
+        result = await db.execute(query)
 
         # Format response
         response = [
-            ReimbursementItem(
-                transaction_id=txn.id,
-                date=str(txn.date),
-                merchant_name=txn.merchant_name or "Unknown",
-                amount=txn.amount,
-                description=txn.description,
-            )
-            for txn in reimbursements
+            {
+                "transaction_id": txn_id,
+                "date": str(txn_date),
+                "merchant_name": merchant_name or "Unknown",
+                "amount": amount,
+                "description": description,
+                "confidence": None,
+            }
+            for txn_id, txn_date, merchant_name, amount, description in result.all()
         ]
 
         return response
@@ -320,27 +402,39 @@ async def get_spending_summary(
     Get overall spending summary with key metrics for the current user.
     """
     try:
-        # Build base query with user filter via Account join
-        query = (
-            select(Transaction)
-            .join(Account, Transaction.account_id == Account.id)
-            .where(Account.user_id == current_user.id)
+        # Compute every metric in a single aggregate query
+        user_id = current_user.id
+        query = lambda_stmt(
+            lambda: select(
+                func.coalesce(func.sum(Transaction.amount), 0.0),
+                func.count(Transaction.id),
+                func.coalesce(
+                    func.sum(
+                        case((Transaction.is_reimbursement == True, Transaction.amount), else_=0.0)
+                    ),
+                    0.0,
+                ),
+                func.count(distinct(Transaction.merchant_name)),
+                func.min(Transaction.date),
+                func.max(Transaction.date),
+            )
+            .where(Transaction.user_id == user_id)
         )
 
         # Apply date filters
-        if start_date:
-            query = query.where(
-                Transaction.date >= datetime.fromisoformat(start_date).date()
-            )
-        if end_date:
-            query = query.where(
-                Transaction.date <= datetime.fromisoformat(end_date).date()
-            )
+        query = _filter_date_range(query, *_parse_range(start_date, end_date))
 
         result = await db.execute(query)
-        transactions = result.scalars().all()
-
-        if not transactions:
+        (
+            total_spent,
+            transaction_count,
+            reimbursements_total,
+            unique_merchants,
+            first_date,
+            last_date,
+        ) = result.one()
+
+        if not transaction_count:
             return {
                 "total_spent": 0.0,
                 "transaction_count": 0,
@@ -349,27 +443,17 @@ async def get_spending_summary(
                 "unique_merchants": 0,
             }
 
-        # Calculate metrics
-        total_spent = sum(txn.amount for txn in transactions)
-        transaction_count = len(transactions)
-        reimbursements_total = sum(
-            txn.amount for txn in transactions if txn.is_reimbursement
-        )
-        unique_merchants = len(
-            set(txn.merchant_name for txn in transactions if txn.merchant_name)
-        )
+        total_spent = float(total_spent)
 
         return {
             "total_spent": round(total_spent, 2),
             "transaction_count": transaction_count,
-            "average_transaction": round(total_spent / transaction_count, 2)
-            if transaction_count > 0
-            else 0.0,
-            "reimbursements_total": round(reimbursements_total, 2),
+            "average_transaction": round(total_spent / transaction_count, 2),
+            "reimbursements_total": round(float(reimbursements_total), 2),
             "unique_merchants": unique_merchants,
             "date_range": {
-                "start": str(min(txn.date for txn in transactions)),
-                "end": str(max(txn.date for txn in transactions)),
+                "start": str(first_date),
+                "end": str(last_date),
             },
         }
 
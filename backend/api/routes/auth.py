@@ -2,9 +2,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import Optional, Tuple
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import timedelta
+import time
 
 from database import get_db
 from services.auth_service import AuthService
@@ -14,6 +17,25 @@ router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# In-process LRU of access token to (cache expiry, user ID). Only the ID is
+# kept, so a cached entry can never hand out stale profile fields
+USER_CACHE_TTL_SECONDS = 60
+USER_CACHE_MAX_SIZE = 1024
+_user_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Identity of the user making a request; load the User row for anything else."""
+
+    id: str
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Forget cached tokens for a user; call after updating or deleting them."""
+    for token in [token for token, (_, cached_id) in _user_cache.items() if cached_id == user_id]:
+        del _user_cache[token]
+
 
 class UserRegisterRequest(BaseModel):
     """Request model for user registration."""
@@ -27,15 +49,14 @@ class UserRegisterRequest(BaseModel):
 class UserResponse(BaseModel):
     """Response model for user data."""
 
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     email: str
     username: str
     full_name: Optional[str]
     is_active: bool
 
-    class Config:
-        from_attributes = True
-
 
 class TokenResponse(BaseModel):
     """Response model for access token."""
@@ -47,8 +68,17 @@ class TokenResponse(BaseModel):
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
-):
+) -> CurrentUser:
     """Dependency to get current authenticated user."""
+    # Skip token decoding and the user lookup for recently seen tokens
+    cached = _user_cache.get(token)
+    if cached is not None:
+        expires_at, user_id = cached
+        if expires_at > time.time():
+            _user_cache.move_to_end(token)
+            return CurrentUser(id=user_id)
+        del _user_cache[token]
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -65,7 +95,15 @@ async def get_current_user(
     user = await auth_service.get_user_by_id(user_id)
     if user is None:
         raise credentials_exception
-    return user
+
+    # Never cache past the token's own expiry; evict the least recently used
+    if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+        _user_cache.popitem(last=False)
+    _user_cache[token] = (
+        min(time.time() + USER_CACHE_TTL_SECONDS, payload.get("exp", 0)),
+        user.id,
+    )
+    return CurrentUser(id=user.id)
 
 
 @router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
@@ -149,6 +187,15 @@ async def login(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user = Depends(get_current_user)):
+async def get_me(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
     """Get current user information."""
-    return UserResponse.model_validate(current_user)
+    user = await AuthService(db).get_user_by_id(current_user.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    return UserResponse.model_validate(user)
@@ -1,24 +1,38 @@
 """Plaid API routes."""
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+import asyncio
 import logging
 
-from database import get_db
-from services.plaid_service import PlaidService
+from database import get_db, AsyncSessionLocal
+from services.cache import cache
+from services.plaid_service import get_plaid_service
 from models.plaid_item import PlaidItem
 from models.account import Account
 from models.transaction import Transaction
 from models.user import User
 from api.routes.auth import get_current_user
+from api.routes.analytics import invalidate_analytics_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/plaid", tags=["plaid"])
 
+ACCOUNTS_CACHE_TTL = 30  # seconds
+
+# Plaid pages buffered between the fetch and the database writer
+SYNC_QUEUE_SIZE = 4
+
+
+def _accounts_cache_key(user_id: str) -> str:
+    """Cache key for a user's connected-accounts listing."""
+    return f"accounts:{user_id}"
+
 
 class LinkTokenResponse(BaseModel):
     """Response for link token creation."""
@@ -60,7 +74,7 @@ class SyncTransactionsResponse(BaseModel):
 async def create_link_token(current_user: User = Depends(get_current_user)):
     """Create a Plaid Link token for account connection."""
     try:
-        plaid_service = PlaidService()
+        plaid_service = get_plaid_service()
         link_token = await plaid_service.create_link_token(user_id=current_user.id)
         return LinkTokenResponse(link_token=link_token)
     except Exception as e:
@@ -80,43 +94,47 @@ async def exchange_public_token(
     This initiates the initial 24-month transaction sync in the background.
     """
     try:
-        plaid_service = PlaidService()
+        plaid_service = get_plaid_service()
 
         # Exchange token
         access_token, item_id = await plaid_service.exchange_public_token(
             request.public_token
         )
 
+        # Fetch institution and accounts concurrently
+        institution_id, accounts_data = await asyncio.gather(
+            plaid_service.get_institution_name(access_token),
+            plaid_service.get_accounts(access_token),
+        )
+
         # Save Plaid item
         plaid_item = PlaidItem(
             user_id=current_user.id,
             access_token=access_token,
             item_id=item_id,
-            institution_id=await plaid_service.get_institution_name(access_token),
+            institution_id=institution_id,
         )
         db.add(plaid_item)
-        await db.commit()
-
-        # Get accounts
-        accounts_data = await plaid_service.get_accounts(access_token)
 
-        # Save accounts
-        for acc_data in accounts_data:
-            account = Account(
+        # Save accounts in the same transaction as the item
+        db.add_all(
+            Account(
                 user_id=current_user.id,
                 plaid_account_id=acc_data["plaid_account_id"],
                 account_name=acc_data["account_name"],
                 account_type=acc_data["account_type"],
-                institution_name=plaid_item.institution_id,
+                institution_name=institution_id,
                 last_four=acc_data.get("mask"),
             )
-            db.add(account)
+            for acc_data in accounts_data
+        )
 
         await db.commit()
+        await cache.delete(_accounts_cache_key(current_user.id))
 
         # Schedule background sync for 24 months
         background_tasks.add_task(
-            sync_transactions_background, item_id, current_user.id, None, None, db
+            sync_transactions_background, item_id, current_user.id, None, None
         )
 
         return ExchangeTokenResponse(
@@ -140,16 +158,16 @@ async def sync_transactions(
     Supports custom date ranges or defaults to 24 months.
     """
     try:
-        # Get Plaid item (filter by user_id)
+        # Check the Plaid item exists (filter by user_id); only its id is needed
         result = await db.execute(
-            select(PlaidItem).where(
+            select(PlaidItem.id).where(
                 PlaidItem.item_id == request.item_id,
                 PlaidItem.user_id == current_user.id,
             )
         )
-        plaid_item = result.scalar_one_or_none()
+        plaid_item_id = result.scalar_one_or_none()
 
-        if not plaid_item:
+        if not plaid_item_id:
             raise HTTPException(status_code=404, detail="Plaid item not found")
 
         # Parse dates if provided
@@ -167,7 +185,6 @@ async def sync_transactions(
             current_user.id,
             start_date,
             end_date,
-            db,
         )
 
         return SyncTransactionsResponse(
@@ -183,76 +200,121 @@ async def sync_transactions(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _insert_new_transactions(dialect_name: str):
+    """Build a bulk INSERT for transactions that ignores duplicate external_ids."""
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    return (
+        dialect_insert(Transaction)
+        .on_conflict_do_nothing(index_elements=["external_id"])
+        .returning(Transaction.external_id)
+    )
+
+
 async def sync_transactions_background(
     item_id: str,
     user_id: str,
     start_date: Optional[datetime],
     end_date: Optional[datetime],
-    db: AsyncSession,
 ):
-    """Background task to sync transactions."""
+    """
+    Background task to sync transactions.
+
+    Runs after the response is sent, when the request's session is already
+    closed, so it opens its own sessions. Plaid pages are fetched by a
+    producer and written by a consumer as they arrive, so network and
+    database I/O overlap.
+    """
     try:
         # Get Plaid item (filter by user_id)
-        result = await db.execute(
-            select(PlaidItem).where(
-                PlaidItem.item_id == item_id, PlaidItem.user_id == user_id
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(PlaidItem.access_token).where(
+                    PlaidItem.item_id == item_id, PlaidItem.user_id == user_id
+                )
             )
-        )
-        plaid_item = result.scalar_one()
+            access_token = result.scalar_one()
+
+        plaid_service = get_plaid_service()
+        pages: asyncio.Queue = asyncio.Queue(maxsize=SYNC_QUEUE_SIZE)
+
+        async def fetch_pages():
+            """Put each Plaid page on the queue, then None (or the fetch error)."""
+            try:
+                async for page in plaid_service.iter_transactions(
+                    access_token, start_date=start_date, end_date=end_date
+                ):
+                    await pages.put(page)
+                await pages.put(None)
+            except Exception as e:
+                await pages.put(e)
+
+        producer = asyncio.create_task(fetch_pages())
+        try:
+            new_count = await _save_transaction_pages(pages, user_id)
+        finally:
+            producer.cancel()
+
+        await invalidate_analytics_cache(user_id)
+        await cache.delete(_accounts_cache_key(user_id))
+        logger.info(f"Synced {new_count} new transactions for item {item_id}")
 
-        plaid_service = PlaidService()
+    except Exception as e:
+        logger.error(f"Background sync failed: {e}")
 
-        # Fetch transactions
-        transactions_data = await plaid_service.sync_transactions(
-            plaid_item.access_token,
-            start_date=start_date,
-            end_date=end_date,
-        )
 
-        # Get account mappings (filter by user_id)
-        result = await db.execute(select(Account).where(Account.user_id == user_id))
-        accounts = {acc.plaid_account_id: acc.id for acc in result.scalars()}
+async def _save_transaction_pages(pages: asyncio.Queue, user_id: str) -> int:
+    """
+    Insert queued pages of Plaid transactions until the producer finishes.
 
-        # Save transactions with deduplication
-        new_count = 0
-        for txn_data in transactions_data:
-            # Check if transaction already exists
-            existing = await db.execute(
-                select(Transaction).where(
-                    Transaction.external_id == txn_data["external_id"]
-                )
-            )
-            if existing.scalar_one_or_none():
-                continue  # Skip duplicates
-
-            # Create transaction
-            transaction = Transaction(
-                external_id=txn_data["external_id"],
-                account_id=accounts.get(txn_data["plaid_account_id"]),
-                amount=txn_data["amount"],
-                date=txn_data["date"],
-                merchant_name=txn_data["merchant_name"],
-                description=txn_data["description"],
-                category=txn_data["category"],
-                source="plaid",
-            )
-            db.add(transaction)
-            new_count += 1
+    Each page is written with one bulk INSERT and committed on its own.
+    last_sync_timestamp is only set once every page has been stored.
 
-        # Update last_sync_timestamp for all accounts (filter by user_id)
-        for account_id in accounts.values():
-            result = await db.execute(
-                select(Account).where(Account.id == account_id, Account.user_id == user_id)
-            )
-            account = result.scalar_one()
-            account.last_sync_timestamp = datetime.now()
+    Returns:
+        Number of newly inserted transactions
+    """
+    async with AsyncSessionLocal() as db:
+        # Get account mappings (filter by user_id)
+        result = await db.execute(
+            select(Account.plaid_account_id, Account.id).where(Account.user_id == user_id)
+        )
+        accounts = dict(result.all())
+        insert_stmt = _insert_new_transactions(db.bind.dialect.name)
 
+        new_count = 0
+        while (page := await pages.get()) is not None:
+            if isinstance(page, Exception):
+                raise page
+
+            # Insert the page in one bulk statement; the database skips external_ids
+            # that are already stored and RETURNING reports which rows were new
+            rows = {
+                txn_data["external_id"]: {
+                    "external_id": txn_data["external_id"],
+                    "account_id": accounts.get(txn_data["plaid_account_id"]),
+                    "user_id": user_id,
+                    "amount": txn_data["amount"],
+                    "date": txn_data["date"],
+                    "merchant_name": txn_data["merchant_name"],
+                    "description": txn_data["description"],
+                    "category": txn_data["category"],
+                    "source": "plaid",
+                }
+                for txn_data in page
+            }
+            if rows:
+                result = await db.execute(insert_stmt, list(rows.values()))
+                new_count += len(result.all())
+                await db.commit()
+
+        # Update last_sync_timestamp for all accounts in one statement (filter by user_id)
+        await db.execute(
+            update(Account)
+            .where(Account.user_id == user_id)
+            .values(last_sync_timestamp=datetime.utcnow())
+        )
         await db.commit()
-        logger.info(f"Synced {new_count} new transactions for item {item_id}")
 
-    except Exception as e:
-        logger.error(f"Background sync failed: {e}")
-        await db.rollback()
+    return new_count
 
 
 @router.get("/accounts")
@@ -260,10 +322,24 @@ async def get_connected_accounts(
     db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)
 ):
     """Get all connected accounts for the current user."""
-    result = await db.execute(select(Account).where(Account.user_id == current_user.id))
-    accounts = result.scalars().all()
-
-    return [
+    cache_key = _accounts_cache_key(current_user.id)
+    cached = await cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Select only the listed columns so no ORM objects are hydrated
+    result = await db.execute(
+        select(
+            Account.id,
+            Account.account_name,
+            Account.account_type,
+            Account.institution_name,
+            Account.last_four,
+            Account.last_sync_timestamp,
+        ).where(Account.user_id == current_user.id)
+    )
+
+    response = [
         {
             "id": acc.id,
             "account_name": acc.account_name,
@@ -274,5 +350,9 @@ async def get_connected_accounts(
             if acc.last_sync_timestamp
             else None,
         }
-        for acc in accounts
+        for acc in result.all()
     ]
+
+    await cache.set(cache_key, response, ACCOUNTS_CACHE_TTL)
+
+    return response
@@ -1,5 +1,6 @@
 """Application configuration management."""
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import cached_property
 from typing import List
 
 
@@ -8,6 +9,8 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./finance.db"
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
 
     # Plaid API
     PLAID_CLIENT_ID: str = ""
@@ -15,15 +18,23 @@ class Settings(BaseSettings):
     PLAID_ENV: str = "sandbox"  # sandbox, development, or production
 
     # LLM Configuration
-    LLM_PROVIDER: str = "ollama"  # 'ollama' or 'openai'
+    LLM_PROVIDER: str = "ollama"  # 'ollama', 'openai' or 'vllm'
 
     # Ollama
     OLLAMA_MODEL: str = "llama3"
     OLLAMA_BASE_URL: str = "http://localhost:11434"
+    OLLAMA_MAX_CONCURRENCY: int = 4  # Keep in line with the server's OLLAMA_NUM_PARALLEL
 
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_MAX_CONCURRENCY: int = 20  # In-flight requests per process
+
+    # vLLM (OpenAI-compatible server)
+    VLLM_BASE_URL: str = "http://localhost:8000/v1"
+    VLLM_MODEL: str = "meta-llama/Meta-Llama-3-8B-Instruct"
+    VLLM_API_KEY: str = ""
+    VLLM_MAX_CONCURRENCY: int = 64  # vLLM batches concurrent requests on the GPU
 
     # Application
     APP_HOST: str = "0.0.0.0"
@@ -33,15 +44,16 @@ class Settings(BaseSettings):
 
     # Redis (optional)
     REDIS_URL: str = "redis://localhost:6379/0"
+    AI_INSIGHT_CACHE_TTL: int = 3600  # seconds
+    LLM_CACHE_TTL: int = 604800  # seconds; per-merchant categorization answers
+    CELERY_ENABLED: bool = False  # Run bulk jobs on a Celery worker instead of in-process
 
-    @property
+    @cached_property
     def cors_origins_list(self) -> List[str]:
-        """Parse CORS origins from comma-separated string."""
-        return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
+        """Parse CORS origins from comma-separated string (computed once)."""
+        return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
 
 # Global settings instance
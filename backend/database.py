@@ -1,17 +1,71 @@
 """Database session management."""
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import settings
 from models.base import Base
 
 
+def _engine_options(url: str) -> dict:
+    """
+    Connection pool and driver settings for the configured database.
+
+    Connections are kept open and reused across requests instead of being
+    reopened per session. In-memory SQLite keeps SQLAlchemy's single shared
+    connection, since every new connection would see an empty database.
+    On asyncpg, larger statement caches keep the repeated sync and analytics
+    statements prepared, and JIT is disabled for these short OLTP queries.
+    """
+    database_url = make_url(url)
+    if database_url.get_backend_name() == "sqlite":
+        if database_url.database in (None, "", ":memory:"):
+            return {}
+        return {"poolclass": AsyncAdaptedQueuePool, "pool_size": 5, "max_overflow": 0}
+
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
+    if database_url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "statement_cache_size": 1024,
+            "prepared_statement_cache_size": 512,
+            "server_settings": {"jit": "off"},
+        }
+    return options
+
+
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
-    poolclass=NullPool if "sqlite" in settings.DATABASE_URL else None,
+    query_cache_size=1200,
+    **_engine_options(settings.DATABASE_URL),
 )
 
+
+if engine.dialect.name == "sqlite":
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """
+        Tune each new SQLite connection.
+
+        WAL lets API reads proceed while a background sync is writing, and
+        the pool keeps these per-connection settings for its lifetime.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-64000")
+        cursor.close()
+
+
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
@@ -31,6 +85,41 @@ async def init_db():
     """Initialize database tables."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_schema)
+
+
+def _upgrade_schema(conn):
+    """
+    Bring tables created by an older version of the models up to date.
+
+    create_all skips existing tables, so add the denormalized
+    transactions.user_id and categorization claim columns, create any
+    missing transaction and Plaid item indexes, and backfill user_id from
+    the owning account.
+    """
+    columns = {column["name"] for column in inspect(conn).get_columns("transactions")}
+    if "user_id" not in columns:
+        conn.execute(
+            text("ALTER TABLE transactions ADD COLUMN user_id VARCHAR(36) REFERENCES users (id)")
+        )
+    if "categorization_claimed_at" not in columns:
+        conn.execute(
+            text("ALTER TABLE transactions ADD COLUMN categorization_claimed_at TIMESTAMP")
+        )
+        # The work-queue index predicate now also excludes claimed rows
+        conn.execute(text("DROP INDEX IF EXISTS idx_uncategorized"))
+
+    for table_name in ("transactions", "plaid_items"):
+        for index in Base.metadata.tables[table_name].indexes:
+            index.create(conn, checkfirst=True)
+
+    conn.execute(
+        text(
+            "UPDATE transactions SET user_id = "
+            "(SELECT accounts.user_id FROM accounts WHERE accounts.id = transactions.account_id) "
+            "WHERE user_id IS NULL AND account_id IS NOT NULL"
+        )
+    )
 
 
 async def drop_db():
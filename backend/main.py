@@ -1,9 +1,12 @@
 """Main FastAPI application."""
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from config import settings
 from database import init_db
+from services.llm.factory import close_llm_providers, get_llm_provider
+from services.plaid_service import close_plaid_service
 from api.routes import plaid, ai, analytics, auth
 import logging
 
@@ -12,6 +15,7 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -19,9 +23,14 @@ async def lifespan(app: FastAPI):
     """Lifespan events for startup and shutdown."""
     # Startup
     await init_db()
+    try:
+        await get_llm_provider().warm_up()
+    except ValueError as e:
+        logger.warning(f"Skipping LLM warm-up: {e}")
     yield
     # Shutdown
-    pass
+    await close_llm_providers()
+    close_plaid_service()
 
 
 app = FastAPI(
@@ -29,6 +38,7 @@ app = FastAPI(
     description="Personal finance analytics with AI-powered insights",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
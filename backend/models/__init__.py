@@ -5,5 +5,6 @@ from .account import Account
 from .transaction import Transaction
 from .ai_insight import AIInsight
 from .plaid_item import PlaidItem
+from .llm_batch import LLMBatch
 
-__all__ = ["Base", "User", "Account", "Transaction", "AIInsight", "PlaidItem"]
+__all__ = ["Base", "User", "Account", "Transaction", "AIInsight", "PlaidItem", "LLMBatch"]
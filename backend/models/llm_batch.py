@@ -0,0 +1,23 @@
+"""LLM batch model for tracking offline categorization jobs."""
+from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy.orm import relationship
+import uuid
+from .base import Base, TimestampMixin
+
+
+class LLMBatch(Base, TimestampMixin):
+    """Represents a categorization job submitted to OpenAI's Batch API."""
+
+    __tablename__ = "llm_batches"
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey("users.id"), nullable=False, index=True)
+    batch_id = Column(String(255), unique=True, nullable=False, index=True)  # OpenAI batch ID
+    status = Column(String(20), nullable=False, default="submitted")  # 'submitted', 'ingested'
+    transaction_count = Column(Integer, nullable=False)
+
+    # Relationships
+    user = relationship("User", back_populates="llm_batches")
+
+    def __repr__(self):
+        return f"<LLMBatch(id={self.id}, batch_id={self.batch_id}, status={self.status})>"
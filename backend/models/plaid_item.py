@@ -1,5 +1,5 @@
 """Plaid Item model for storing Plaid access tokens."""
-from sqlalchemy import Column, String, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import uuid
 from .base import Base, TimestampMixin
@@ -19,5 +19,17 @@ class PlaidItem(Base, TimestampMixin):
     # Relationships
     user = relationship("User", back_populates="plaid_items")
 
+    # Sync looks items up by (item_id, user_id); include the access token on
+    # PostgreSQL so the lookup is answered from the index alone
+    __table_args__ = (
+        Index(
+            "idx_plaiditem_user_item",
+            "user_id",
+            "item_id",
+            unique=True,
+            postgresql_include=["access_token"],
+        ),
+    )
+
     def __repr__(self):
         return f"<PlaidItem(id={self.id}, item_id={self.item_id}, institution={self.institution_id})>"
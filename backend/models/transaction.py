@@ -1,5 +1,16 @@
 """Transaction model for financial transactions."""
-from sqlalchemy import Column, String, Float, Date, Text, Boolean, ForeignKey, Index
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.orm import relationship
 import uuid
 from .base import Base, TimestampMixin
@@ -15,6 +26,9 @@ class Transaction(Base, TimestampMixin):
         String(255), unique=True, nullable=False, index=True
     )  # Plaid or Venmo ID
     account_id = Column(String(36), ForeignKey("accounts.id"), nullable=True)
+    user_id = Column(
+        String(36), ForeignKey("users.id"), nullable=True
+    )  # Denormalized from Account so analytics can filter without a join
     amount = Column(Float, nullable=False)
     date = Column(Date, nullable=False, index=True)
     merchant_name = Column(String(255))
@@ -23,15 +37,63 @@ class Transaction(Base, TimestampMixin):
     source = Column(String(20), nullable=False)  # 'plaid', 'venmo', 'manual'
     is_reimbursement = Column(Boolean, default=False)
     ai_category = Column(String(100))  # LLM-generated category
+    categorization_claimed_at = Column(
+        DateTime, nullable=True
+    )  # Set when a bulk categorization job takes the row
 
     # Relationships
     account = relationship("Account", back_populates="transactions")
 
-    # Composite indexes for common queries
+    # Composite indexes for common queries. The analytics group-bys also get
+    # covering indexes on PostgreSQL (INCLUDE) so sum/count run index-only.
     __table_args__ = (
-        Index("idx_account_date", "account_id", "date"),
+        Index(
+            "idx_account_date",
+            "account_id",
+            "date",
+            postgresql_include=["amount", "id", "merchant_name"],
+        ),
         Index("idx_date_desc", "date"),
         Index("idx_category", "category", "date"),
+        Index(
+            "idx_user_date",
+            "user_id",
+            "date",
+            postgresql_include=["amount", "id", "merchant_name"],
+        ),
+        Index(
+            "idx_user_category_date",
+            "user_id",
+            "category",
+            "date",
+            postgresql_include=["amount", "id", "merchant_name"],
+        ),
+        Index(
+            "idx_user_ai_category_date",
+            "user_id",
+            "ai_category",
+            "date",
+            postgresql_include=["amount", "id", "merchant_name"],
+            postgresql_where=text("ai_category IS NOT NULL"),
+            sqlite_where=text("ai_category IS NOT NULL"),
+        ),
+        Index(
+            "idx_user_reimbursement_date",
+            "user_id",
+            "is_reimbursement",
+            "date",
+            postgresql_include=["amount", "id", "merchant_name"],
+            postgresql_where=text("is_reimbursement"),
+            sqlite_where=text("is_reimbursement"),
+        ),
+        # Partial index over the bulk-categorization work queue: rows that
+        # are neither categorized nor claimed by a running job
+        Index(
+            "idx_uncategorized",
+            "id",
+            postgresql_where=text("ai_category IS NULL AND categorization_claimed_at IS NULL"),
+            sqlite_where=text("ai_category IS NULL AND categorization_claimed_at IS NULL"),
+        ),
     )
 
     def __repr__(self):
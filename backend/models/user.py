@@ -21,6 +21,7 @@ class User(Base, TimestampMixin):
     accounts = relationship("Account", back_populates="user")
     plaid_items = relationship("PlaidItem", back_populates="user")
     ai_insights = relationship("AIInsight", back_populates="user")
+    llm_batches = relationship("LLMBatch", back_populates="user")
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, username={self.username})>"
@@ -1,5 +1,5 @@
 """Account schemas for request/response validation."""
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import Optional
 
@@ -29,11 +29,10 @@ class AccountUpdate(BaseModel):
 class AccountRead(AccountBase):
     """Schema for reading an account."""
 
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     plaid_account_id: str
     last_sync_timestamp: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
-
-    class Config:
-        from_attributes = True
@@ -1,5 +1,5 @@
 """AI Insight schemas for request/response validation."""
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime, date
 from typing import Optional
 
@@ -16,16 +16,17 @@ class AIInsightBase(BaseModel):
 class AIInsightCreate(AIInsightBase):
     """Schema for creating an AI insight."""
 
+    model_config = ConfigDict(protected_namespaces=())
+
     model_used: Optional[str] = None
 
 
 class AIInsightRead(AIInsightBase):
     """Schema for reading an AI insight."""
 
+    model_config = ConfigDict(from_attributes=True, protected_namespaces=())
+
     id: str
     model_used: Optional[str] = None
     created_at: datetime
     updated_at: datetime
-
-    class Config:
-        from_attributes = True
@@ -1,5 +1,5 @@
 """Transaction schemas for request/response validation."""
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime, date
 from typing import Optional
 
@@ -34,6 +34,8 @@ class TransactionUpdate(BaseModel):
 class TransactionRead(TransactionBase):
     """Schema for reading a transaction."""
 
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     external_id: str
     account_id: Optional[str] = None
@@ -41,6 +43,3 @@ class TransactionRead(TransactionBase):
     ai_category: Optional[str] = None
     created_at: datetime
     updated_at: datetime
-
-    class Config:
-        from_attributes = True
@@ -1,4 +1,5 @@
 """Authentication service for user management."""
+import asyncio
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -20,7 +21,8 @@ class AuthService:
         full_name: Optional[str] = None,
     ) -> User:
         """Create a new user with hashed password."""
-        hashed_password = get_password_hash(password)
+        # bcrypt is CPU-bound; hash on a worker thread to keep the event loop free
+        hashed_password = await asyncio.to_thread(get_password_hash, password)
         user = User(
             email=email,
             username=username,
@@ -54,6 +56,6 @@ class AuthService:
         user = await self.get_user_by_username(username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await asyncio.to_thread(verify_password, password, user.hashed_password):
             return None
         return user
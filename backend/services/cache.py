@@ -0,0 +1,123 @@
+"""Redis-backed cache for API responses."""
+from typing import Any, List, Optional
+from config import settings
+import hashlib
+import json
+import logging
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis is an optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheService:
+    """
+    JSON cache on top of Redis.
+
+    Every operation degrades to a no-op when Redis is not installed,
+    not configured, or unreachable, so callers never depend on it.
+    """
+
+    def __init__(self, url: str = settings.REDIS_URL):
+        """
+        Initialize the cache client.
+
+        Args:
+            url: Redis connection URL; an empty string disables caching
+        """
+        self.url = url
+        self.client = self._connect(url)
+
+    @staticmethod
+    def _connect(url: str):
+        """Create a Redis client for the URL, or None if caching is disabled."""
+        if redis is None or not url:
+            return None
+        return redis.from_url(url, socket_connect_timeout=0.25, socket_timeout=0.25)
+
+    @staticmethod
+    def make_key(namespace: str, *parts: Any) -> str:
+        """
+        Build a cache key from a namespace and a hash of the given parts.
+
+        Args:
+            namespace: Key prefix, e.g. 'ai_insight'
+            parts: JSON-serializable values identifying the cached item
+
+        Returns:
+            Cache key string
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return f"{namespace}:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for a key, or None on miss or error."""
+        if self.client is None:
+            return None
+        try:
+            raw = await self.client.get(key)
+        except Exception as e:
+            logger.warning(f"Cache get failed for {key}: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Return cached values for several keys in one round trip, None for each miss."""
+        if self.client is None or not keys:
+            return [None] * len(keys)
+        try:
+            raws = await self.client.mget(keys)
+        except Exception as e:
+            logger.warning(f"Cache get_many failed for {len(keys)} keys: {e}")
+            return [None] * len(keys)
+        return [json.loads(raw) if raw is not None else None for raw in raws]
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store a JSON-serializable value under a key for ttl seconds."""
+        if self.client is None:
+            return
+        try:
+            await self.client.setex(key, ttl, json.dumps(value, default=str))
+        except Exception as e:
+            logger.warning(f"Cache set failed for {key}: {e}")
+
+    async def delete(self, key: str) -> None:
+        """Remove a key so the next read goes back to the source."""
+        if self.client is None:
+            return
+        try:
+            await self.client.delete(key)
+        except Exception as e:
+            logger.warning(f"Cache delete failed for {key}: {e}")
+
+    async def incr(self, key: str) -> None:
+        """Atomically increment an integer counter, e.g. a cache version."""
+        if self.client is None:
+            return
+        try:
+            await self.client.incr(key)
+        except Exception as e:
+            logger.warning(f"Cache incr failed for {key}: {e}")
+
+    async def reset(self) -> None:
+        """
+        Close the connection pool and start a fresh client.
+
+        Redis connections are bound to the event loop that opened them, so
+        code that runs each job in its own loop (e.g. a Celery task calling
+        asyncio.run) resets the cache before that loop closes.
+        """
+        if self.client is None:
+            return
+        try:
+            await self.client.aclose()
+        except Exception as e:
+            logger.warning(f"Cache close failed: {e}")
+        self.client = self._connect(self.url)
+
+
+# Global cache instance
+cache = CacheService()
@@ -2,6 +2,13 @@
 from .base import BaseLLMProvider
 from .ollama_provider import OllamaProvider
 from .openai_provider import OpenAIProvider
+from .vllm_provider import VLLMProvider
 from .factory import get_llm_provider
 
-__all__ = ["BaseLLMProvider", "OllamaProvider", "OpenAIProvider", "get_llm_provider"]
+__all__ = [
+    "BaseLLMProvider",
+    "OllamaProvider",
+    "OpenAIProvider",
+    "VLLMProvider",
+    "get_llm_provider",
+]
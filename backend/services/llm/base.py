@@ -1,11 +1,76 @@
 """Base LLM provider interface."""
 from abc import ABC, abstractmethod
-from typing import List, Dict
+import asyncio
+from typing import AsyncIterator, List, Dict, Optional
+import orjson
+import re
+
+# Words that suggest money coming back from someone
+REIMBURSEMENT_KEYWORDS = frozenset(
+    {"reimburse", "paid back", "split", "venmo", "zelle", "repay", "refund"}
+)
+
+# All keywords matched in one case-insensitive regex pass
+REIMBURSEMENT_KEYWORD_RE = re.compile(
+    "|".join(re.escape(keyword) for keyword in sorted(REIMBURSEMENT_KEYWORDS)),
+    re.IGNORECASE,
+)
+
+# Peer-to-peer payment merchants; a keyword hit on these is unambiguous
+P2P_MERCHANTS = frozenset({"venmo", "zelle", "cash app", "cashapp", "paypal"})
+
+# Sent first and byte-identical on every insight request, so providers that
+# cache prompt prefixes can reuse it
+INSIGHT_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are a financial analyst AI assistant. Provide clear, actionable insights.",
+}
+
+
+def has_reimbursement_keyword(transaction: Dict) -> bool:
+    """Return True if a transaction's description or merchant mentions a reimbursement keyword."""
+    return (
+        REIMBURSEMENT_KEYWORD_RE.search(transaction.get("description") or "") is not None
+        or REIMBURSEMENT_KEYWORD_RE.search(transaction.get("merchant_name") or "") is not None
+    )
+
+
+def keyword_hits(transactions: List[Dict]) -> List[bool]:
+    """
+    Flag reimbursement keyword hits for a batch of transactions.
+
+    Lets callers skip the LLM for transactions that cannot be reimbursements
+    by keyword alone, before calling detect_reimbursement on the rest.
+
+    Args:
+        transactions: List of transaction dictionaries
+
+    Returns:
+        One boolean per transaction, in order
+    """
+    return [has_reimbursement_keyword(txn) for txn in transactions]
 
 
 class BaseLLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
+    @staticmethod
+    def _insight_messages(prompt: str, transactions: List[Dict]) -> List[Dict]:
+        """Build the chat messages for an insight request."""
+        tx_text = "\n".join(
+            f"- {t.get('date')}: {t.get('merchant_name', 'Unknown')} (${t.get('amount', 0):.2f})"
+            for t in transactions
+        )
+
+        full_prompt = f"""{prompt}
+
+Transactions:
+{tx_text}
+
+Provide a concise analysis in 3-4 sentences."""
+
+        return [INSIGHT_SYSTEM_MESSAGE, {"role": "user", "content": full_prompt}]
+
     @abstractmethod
     async def generate_insight(self, prompt: str, transactions: List[Dict]) -> str:
         """
@@ -17,9 +82,34 @@ class BaseLLMProvider(ABC):
 
         Returns:
             Generated insight text
+
+        Raises:
+            Exception: If the LLM call fails; unlike categorization there is
+                no sensible fallback answer, so callers handle the error
         """
         pass
 
+    async def stream_insight(
+        self, prompt: str, transactions: List[Dict]
+    ) -> AsyncIterator[str]:
+        """
+        Stream an AI insight from transactions as it is generated.
+
+        Providers override this to yield tokens as they arrive; the default
+        yields the complete generate_insight result as a single chunk.
+
+        Args:
+            prompt: The prompt template for the LLM
+            transactions: List of transaction dictionaries
+
+        Yields:
+            Chunks of generated insight text
+
+        Raises:
+            Exception: If the LLM call fails, possibly after some chunks
+        """
+        yield await self.generate_insight(prompt, transactions)
+
     @abstractmethod
     async def categorize_transaction(self, transaction: Dict) -> str:
         """
@@ -33,6 +123,98 @@ class BaseLLMProvider(ABC):
         """
         pass
 
+    async def categorize_transactions_batch(self, transactions: List[Dict]) -> List[str]:
+        """
+        Categorize several transactions at once.
+
+        Providers override this to pack the whole batch into a single request;
+        the default falls back to one categorize_transaction call per item,
+        issued concurrently (providers bound their own in-flight requests).
+
+        Args:
+            transactions: List of transaction dictionaries
+
+        Returns:
+            List of category names, in the same order as the input
+        """
+        return list(
+            await asyncio.gather(*(self.categorize_transaction(txn) for txn in transactions))
+        )
+
+    @staticmethod
+    def _parse_category_list(content: str, count: int) -> Optional[List[str]]:
+        """
+        Parse a batch categorization reply into a list of category names.
+
+        Models often wrap the JSON array in prose or a code fence, so the
+        outermost [...] span is parsed rather than the raw reply.
+
+        Args:
+            content: Raw model reply
+            count: Number of transactions in the batch
+
+        Returns:
+            List of category names, or None if the reply has the wrong shape
+        """
+        start, end = content.find("["), content.rfind("]")
+        if start == -1 or end < start:
+            return None
+        try:
+            categories = orjson.loads(content[start : end + 1])
+        except ValueError:
+            return None
+        if not isinstance(categories, list) or len(categories) != count:
+            return None
+        return [str(category).strip() for category in categories]
+
+    @staticmethod
+    def _parse_reimbursement(content: str) -> Optional[tuple[bool, float]]:
+        """
+        Parse a reimbursement reply into (is_reimbursement, confidence).
+
+        As with category lists, the outermost {...} span is parsed so replies
+        wrapped in prose or a code fence don't fall back to keyword matching.
+
+        Args:
+            content: Raw model reply
+
+        Returns:
+            Tuple of (is_reimbursement, confidence), or None if unparseable
+        """
+        start, end = content.find("{"), content.rfind("}")
+        if start == -1 or end < start:
+            return None
+        try:
+            result = orjson.loads(content[start : end + 1])
+        except ValueError:
+            return None
+        if not isinstance(result, dict):
+            return None
+        return (result.get("is_reimbursement", False), result.get("confidence", 0.5))
+
+    @staticmethod
+    def _reimbursement_fast_path(transaction: Dict) -> Optional[tuple[bool, float]]:
+        """
+        Answer obvious reimbursements without calling the LLM.
+
+        Args:
+            transaction: Transaction dictionary
+
+        Returns:
+            (True, 0.95) for a keyword hit on a peer-to-peer merchant, else None
+        """
+        merchant = (transaction.get("merchant_name") or "").strip().lower()
+        if merchant in P2P_MERCHANTS and has_reimbursement_keyword(transaction):
+            return (True, 0.95)
+        return None
+
+    @staticmethod
+    def _keyword_reimbursement(transaction: Dict) -> tuple[bool, float]:
+        """Keyword-only reimbursement guess, used when the LLM call fails."""
+        if has_reimbursement_keyword(transaction):
+            return (True, 0.7)
+        return (False, 0.3)
+
     @abstractmethod
     async def detect_reimbursement(self, transaction: Dict) -> tuple[bool, float]:
         """
@@ -45,3 +227,11 @@ class BaseLLMProvider(ABC):
             Tuple of (is_reimbursement, confidence_score)
         """
         pass
+
+    async def warm_up(self) -> None:
+        """Open network connections ahead of the first request."""
+        pass
+
+    async def close(self) -> None:
+        """Release network clients held by the provider."""
+        pass
@@ -0,0 +1,122 @@
+"""Offline bulk categorization through OpenAI's Batch API."""
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+from .openai_provider import OpenAIProvider
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+
+class OpenAIBatchCategorizer:
+    """
+    Categorize large transaction sets with OpenAI's Batch API.
+
+    Batch requests are billed at half price and run against a separate,
+    much higher rate limit, at the cost of completing asynchronously
+    (within 24 hours). Use the provider's realtime methods for interactive
+    paths.
+    """
+
+    def __init__(self, provider: OpenAIProvider):
+        """
+        Initialize the batch categorizer.
+
+        Args:
+            provider: OpenAI provider whose client, model and prompt are used
+        """
+        self.provider = provider
+
+    def build_requests(self, transactions: List[Dict]) -> bytes:
+        """
+        Build the JSONL input file, one chat completion request per transaction.
+
+        Args:
+            transactions: Transaction dictionaries, each with an 'id' key
+
+        Returns:
+            JSONL file contents
+        """
+        lines = [
+            json.dumps(
+                {
+                    "custom_id": txn["id"],
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": self.provider._categorize_request(txn),
+                }
+            )
+            for txn in transactions
+        ]
+        return "\n".join(lines).encode()
+
+    async def submit(self, transactions: List[Dict]) -> str:
+        """
+        Upload the requests and start a batch job.
+
+        Args:
+            transactions: Transaction dictionaries, each with an 'id' key
+
+        Returns:
+            OpenAI batch ID
+        """
+        client = self.provider.client
+        input_file = await self.provider._call(
+            client.files.create,
+            file=("categorize.jsonl", self.build_requests(transactions)),
+            purpose="batch",
+        )
+        batch = await self.provider._call(
+            client.batches.create,
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id} for {len(transactions)} transactions")
+        return batch.id
+
+    async def fetch_results(self, batch_id: str) -> Tuple[str, Optional[Dict[str, str]]]:
+        """
+        Check a batch job and download its categories once it has completed.
+
+        Args:
+            batch_id: OpenAI batch ID
+
+        Returns:
+            Tuple of (batch status, {transaction_id: category} or None if not completed)
+        """
+        client = self.provider.client
+        batch = await self.provider._call(client.batches.retrieve, batch_id=batch_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            return batch.status, None
+
+        output = await self.provider._call(client.files.content, file_id=batch.output_file_id)
+        return batch.status, self.parse_results(output.text)
+
+    @staticmethod
+    def parse_results(content: str) -> Dict[str, str]:
+        """
+        Parse a batch output file into categories keyed by transaction ID.
+
+        Requests that failed are skipped, leaving those transactions
+        uncategorized for a later run.
+
+        Args:
+            content: JSONL output file contents
+
+        Returns:
+            Dictionary of transaction_id to category
+        """
+        categories = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            response = result.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            choices = response.get("body", {}).get("choices") or []
+            if choices:
+                categories[result["custom_id"]] = choices[0]["message"]["content"].strip()
+        return categories
@@ -0,0 +1,223 @@
+"""Response cache for per-transaction LLM calls."""
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from config import settings
+from services.cache import CacheService, cache
+import asyncio
+
+
+class Uncached:
+    """
+    Provider answer that must not be cached.
+
+    Providers wrap their fallback answers (used when the LLM call failed)
+    in this so a transient outage does not pin a wrong answer. The cache
+    decorators unwrap it, so callers always get the plain value.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class LLMResponseCache:
+    """
+    Two-level cache for LLM answers about individual transactions.
+
+    Most spending repeats the same merchants, so answers are keyed by
+    model, normalized merchant name and rounded amount, plus the normalized
+    description where the answer depends on it. Hits are served
+    from an in-process LRU first, then from Redis, which is shared
+    between workers and survives restarts. Concurrent misses for the same
+    key share a single LLM call.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: int = settings.LLM_CACHE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries kept in process memory
+            ttl: Redis expiry in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(
+        namespace: str, model: str, transaction: Dict, with_description: bool = False
+    ) -> str:
+        """
+        Build the cache key for a transaction.
+
+        Args:
+            namespace: Kind of answer, e.g. 'category'
+            model: Model name, so switching models does not reuse answers
+            transaction: Transaction dictionary
+            with_description: Also key on the normalized description
+
+        Returns:
+            Cache key string
+        """
+        merchant = (transaction.get("merchant_name") or "").strip().lower()
+        amount = round(transaction.get("amount") or 0)
+        parts = [model, merchant, amount]
+        if with_description:
+            parts.append(" ".join((transaction.get("description") or "").lower().split()))
+        return CacheService.make_key(f"llm:{namespace}", *parts)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return a cached answer, or None on miss."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        value = await cache.get(key)
+        if value is not None:
+            value = tuple(value) if isinstance(value, list) else value
+            self._remember(key, value)
+        return value
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Return cached answers for several keys, fetching memory misses in one Redis call."""
+        results: List[Optional[Any]] = [None] * len(keys)
+        remote = []
+        for i, key in enumerate(keys):
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                results[i] = self._memory[key]
+            else:
+                remote.append(i)
+
+        if remote:
+            values = await cache.get_many([keys[i] for i in remote])
+            for i, value in zip(remote, values):
+                if value is not None:
+                    value = tuple(value) if isinstance(value, list) else value
+                    self._remember(keys[i], value)
+                    results[i] = value
+        return results
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store an answer in process memory and Redis."""
+        self._remember(key, value)
+        await cache.set(key, value, self.ttl)
+
+    async def coalesce(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run compute once per key at a time; concurrent callers share its result.
+
+        The call runs in its own task that every caller awaits through
+        shield, so a caller that is cancelled (e.g. its client disconnected)
+        only stops waiting and the others still get the result.
+
+        Args:
+            key: Cache key identifying the request
+            compute: Coroutine factory making the actual LLM call
+
+        Returns:
+            The computed (or shared) result
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        """Forget a finished call so the next miss for its key starts a new one."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved when every caller has gone
+
+    def _remember(self, key: str, value: Any) -> None:
+        """Add an entry to the in-process LRU, evicting the oldest if full."""
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+
+# Global LLM response cache instance
+llm_cache = LLMResponseCache()
+
+
+def cached_per_transaction(
+    namespace: str,
+    with_description: bool = False,
+    shortcut: Optional[Callable[[Dict], Optional[Any]]] = None,
+):
+    """
+    Cache a provider method that takes a single transaction dictionary.
+
+    Args:
+        namespace: Kind of answer, e.g. 'category'
+        with_description: Key on the description as well as merchant and amount
+        shortcut: Optional rule answering without the LLM; it runs before the
+            cache lookup so a rule hit is never masked by a cached LLM answer
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, transaction: Dict):
+            if shortcut is not None:
+                answer = shortcut(transaction)
+                if answer is not None:
+                    return answer
+
+            key = llm_cache.make_key(namespace, self.model, transaction, with_description)
+            cached = await llm_cache.get(key)
+            if cached is not None:
+                return cached
+
+            result = await llm_cache.coalesce(key, lambda: func(self, transaction))
+            if isinstance(result, Uncached):
+                return result.value
+            await llm_cache.set(key, result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def cached_batch(namespace: str):
+    """
+    Cache a provider method that categorizes a list of transactions.
+
+    Only the transactions without a cached answer are sent to the LLM,
+    and transactions sharing a cache key are sent once.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(self, transactions: List[Dict]) -> List[str]:
+            keys = [llm_cache.make_key(namespace, self.model, txn) for txn in transactions]
+            results = await llm_cache.get_many(keys)
+
+            # Group misses by key so repeated merchants are categorized once
+            misses: Dict[str, List[int]] = {}
+            for i, result in enumerate(results):
+                if result is None:
+                    misses.setdefault(keys[i], []).append(i)
+            if misses:
+                fresh = await func(
+                    self, [transactions[indexes[0]] for indexes in misses.values()]
+                )
+                for (key, indexes), result in zip(misses.items(), fresh):
+                    value = result.value if isinstance(result, Uncached) else result
+                    for i in indexes:
+                        results[i] = value
+                    if not isinstance(result, Uncached):
+                        await llm_cache.set(key, result)
+            return results
+
+        return wrapper
+
+    return decorator
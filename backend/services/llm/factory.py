@@ -1,16 +1,23 @@
 """LLM provider factory."""
+from typing import Dict, Tuple
 from .base import BaseLLMProvider
 from .ollama_provider import OllamaProvider
 from .openai_provider import OpenAIProvider
+from .vllm_provider import VLLMProvider
 from config import settings
 
+# Providers are reused across requests so their HTTP connection pools stay warm
+_providers: Dict[Tuple[str, ...], BaseLLMProvider] = {}
+
 
 def get_llm_provider() -> BaseLLMProvider:
     """
-    Factory function to instantiate the correct LLM provider based on settings.
+    Factory function to get the correct LLM provider based on settings.
+
+    One instance is created per provider configuration and then reused.
 
     Returns:
-        Instance of BaseLLMProvider (either OllamaProvider or OpenAIProvider)
+        Instance of BaseLLMProvider (OllamaProvider, OpenAIProvider or VLLMProvider)
 
     Raises:
         ValueError: If unknown provider is specified
@@ -18,12 +25,59 @@ def get_llm_provider() -> BaseLLMProvider:
     provider = settings.LLM_PROVIDER.lower()
 
     if provider == "ollama":
-        return OllamaProvider(model=settings.OLLAMA_MODEL, base_url=settings.OLLAMA_BASE_URL)
+        key = (
+            provider,
+            settings.OLLAMA_MODEL,
+            settings.OLLAMA_BASE_URL,
+            settings.OLLAMA_MAX_CONCURRENCY,
+        )
+        if key not in _providers:
+            _providers[key] = OllamaProvider(
+                model=settings.OLLAMA_MODEL,
+                base_url=settings.OLLAMA_BASE_URL,
+                max_concurrency=settings.OLLAMA_MAX_CONCURRENCY,
+            )
+        return _providers[key]
     elif provider == "openai":
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is required when using OpenAI provider")
-        return OpenAIProvider(api_key=settings.OPENAI_API_KEY, model=settings.OPENAI_MODEL)
+        key = (
+            provider,
+            settings.OPENAI_API_KEY,
+            settings.OPENAI_MODEL,
+            settings.OPENAI_MAX_CONCURRENCY,
+        )
+        if key not in _providers:
+            _providers[key] = OpenAIProvider(
+                api_key=settings.OPENAI_API_KEY,
+                model=settings.OPENAI_MODEL,
+                max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+            )
+        return _providers[key]
+    elif provider == "vllm":
+        key = (
+            provider,
+            settings.VLLM_MODEL,
+            settings.VLLM_BASE_URL,
+            settings.VLLM_API_KEY,
+            settings.VLLM_MAX_CONCURRENCY,
+        )
+        if key not in _providers:
+            _providers[key] = VLLMProvider(
+                model=settings.VLLM_MODEL,
+                base_url=settings.VLLM_BASE_URL,
+                api_key=settings.VLLM_API_KEY,
+                max_concurrency=settings.VLLM_MAX_CONCURRENCY,
+            )
+        return _providers[key]
     else:
         raise ValueError(
-            f"Unknown LLM provider: {provider}. Must be 'ollama' or 'openai'"
+            f"Unknown LLM provider: {provider}. Must be 'ollama', 'openai' or 'vllm'"
         )
+
+
+async def close_llm_providers() -> None:
+    """Close all cached providers; called on application shutdown."""
+    for provider in _providers.values():
+        await provider.close()
+    _providers.clear()
@@ -1,56 +1,80 @@
 """Ollama LLM provider implementation."""
+import asyncio
+import httpx
 import ollama
-import json
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
 from .base import BaseLLMProvider
+from .cache import Uncached, cached_batch, cached_per_transaction
+from services.retry import is_transient_status, retrying
+
+
+def _is_transient_ollama_error(exc: BaseException) -> bool:
+    """Connection failures and an overloaded or erroring server are worth retrying."""
+    if isinstance(exc, ollama.ResponseError):
+        return is_transient_status(exc.status_code)
+    return isinstance(exc, httpx.TransportError)
 
 
 class OllamaProvider(BaseLLMProvider):
     """Ollama provider for local LLM inference."""
 
-    def __init__(self, model: str = "llama3", base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        model: str = "llama3",
+        base_url: str = "http://localhost:11434",
+        max_concurrency: int = 4,
+    ):
         """
         Initialize Ollama provider.
 
         Args:
             model: Model name (e.g., 'llama3', 'mistral')
             base_url: Ollama API base URL
+            max_concurrency: Maximum in-flight requests; match the server's OLLAMA_NUM_PARALLEL
         """
         self.model = model
         self.base_url = base_url
+        # ollama builds its own httpx client, so own the connection pool by
+        # handing it a transport we can close
+        self._transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            )
+        )
+        self.client = ollama.AsyncClient(host=base_url, transport=self._transport)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _chat(self, **kwargs) -> Dict:
+        """Send a chat request within the concurrency limit, retrying transient failures."""
+        async for attempt in retrying("ollama", _is_transient_ollama_error):
+            with attempt:
+                # Hold a slot per attempt, not across the backoff sleep
+                async with self._semaphore:
+                    return await self.client.chat(model=self.model, **kwargs)
 
     async def generate_insight(self, prompt: str, transactions: List[Dict]) -> str:
         """Generate AI insight from transactions using Ollama."""
-        # Format transactions for LLM
-        tx_text = "\n".join(
-            [
-                f"- {t.get('date')}: {t.get('merchant_name', 'Unknown')} (${t.get('amount', 0):.2f})"
-                for t in transactions
-            ]
+        response = await self._chat(
+            messages=self._insight_messages(prompt, transactions),
         )
-
-        full_prompt = f"""{prompt}
-
-Transactions:
-{tx_text}
-
-Provide a concise analysis in 3-4 sentences."""
-
-        try:
-            response = ollama.chat(
+        return response["message"]["content"]
+
+    async def stream_insight(
+        self, prompt: str, transactions: List[Dict]
+    ) -> AsyncIterator[str]:
+        """Stream AI insight tokens from Ollama as they are generated."""
+        async with self._semaphore:
+            stream = await self.client.chat(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial analyst AI assistant. Provide clear, actionable insights.",
-                    },
-                    {"role": "user", "content": full_prompt},
-                ],
+                messages=self._insight_messages(prompt, transactions),
+                stream=True,
             )
-            return response["message"]["content"]
-        except Exception as e:
-            return f"Error generating insight: {str(e)}"
+            async for part in stream:
+                if part["message"]["content"]:
+                    yield part["message"]["content"]
 
+    @cached_per_transaction("category")
     async def categorize_transaction(self, transaction: Dict) -> str:
         """Categorize a transaction using Ollama."""
         prompt = f"""Categorize this transaction into ONE of these categories:
@@ -63,15 +87,60 @@ Description: {transaction.get('description', 'N/A')}
 Respond with ONLY the category name, nothing else."""
 
         try:
-            response = ollama.chat(
-                model=self.model,
+            response = await self._chat(
                 messages=[{"role": "user", "content": prompt}],
             )
             category = response["message"]["content"].strip()
             return category
         except Exception as e:
-            return "Other"
+            return Uncached("Other")
+
+    @cached_batch("category")
+    async def categorize_transactions_batch(self, transactions: List[Dict]) -> List[str]:
+        """Categorize a batch of transactions with a single Ollama request."""
+        if not transactions:
+            return []
 
+        tx_lines = "\n".join(
+            [
+                f"{i}. {t.get('merchant_name', 'Unknown')} - ${t.get('amount', 0):.2f} ({t.get('description', 'N/A')})"
+                for i, t in enumerate(transactions, start=1)
+            ]
+        )
+
+        prompt = f"""Categorize each of these transactions into ONE of these categories:
+Groceries, Dining Out, Transportation, Entertainment, Shopping,
+Bills & Utilities, Healthcare, Travel, Personal Care, Other
+
+Transactions:
+{tx_lines}
+
+Respond with ONLY a JSON array of {len(transactions)} category names, in the same order as the transactions."""
+
+        try:
+            response = await self._chat(
+                messages=[{"role": "user", "content": prompt}],
+            )
+            categories = self._parse_category_list(
+                response["message"]["content"], len(transactions)
+            )
+            if categories is not None:
+                return categories
+        except Exception:
+            pass
+
+        # Fall back to categorizing one transaction at a time; those calls
+        # cache their own answers under the same keys
+        return [
+            Uncached(category)
+            for category in await super().categorize_transactions_batch(transactions)
+        ]
+
+    @cached_per_transaction(
+        "reimbursement",
+        with_description=True,
+        shortcut=BaseLLMProvider._reimbursement_fast_path,
+    )
     async def detect_reimbursement(self, transaction: Dict) -> tuple[bool, float]:
         """Detect if a transaction is a reimbursement using Ollama."""
         description = transaction.get("description", "")
@@ -86,28 +155,22 @@ Amount: ${transaction.get('amount', 0):.2f}
 Look for keywords like: reimburse, paid back, split, venmo, zelle, repay, refund
 
 Respond in JSON format:
-{{"is_reimbursement": true/false, "confidence": 0.0-1.0, "reasoning": "brief explanation"}}"""
+{{"is_reimbursement": true/false, "confidence": 0.0-1.0}}"""
 
         try:
-            response = ollama.chat(
-                model=self.model,
+            response = await self._chat(
                 messages=[{"role": "user", "content": prompt}],
+                format="json",
             )
-            result = json.loads(response["message"]["content"])
-            return (result.get("is_reimbursement", False), result.get("confidence", 0.5))
+            result = self._parse_reimbursement(response["message"]["content"])
+            if result is not None:
+                return result
         except Exception:
-            # Fallback to keyword detection
-            keywords = [
-                "reimburse",
-                "paid back",
-                "split",
-                "venmo",
-                "zelle",
-                "repay",
-                "refund",
-            ]
-            text = f"{description} {merchant}".lower()
-            for keyword in keywords:
-                if keyword in text:
-                    return (True, 0.7)
-            return (False, 0.3)
+            pass
+
+        # Fallback to keyword detection
+        return Uncached(self._keyword_reimbursement(transaction))
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self._transport.aclose()
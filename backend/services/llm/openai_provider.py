@@ -1,60 +1,121 @@
 """OpenAI LLM provider implementation."""
-from openai import AsyncOpenAI
-import json
-from typing import List, Dict
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI, DEFAULT_TIMEOUT
+import asyncio
+import httpx
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Dict, Optional
 from .base import BaseLLMProvider
+from .cache import Uncached, cached_batch, cached_per_transaction
+from services.retry import is_transient_status, retrying
+
+logger = logging.getLogger(__name__)
+
+# Structured output for reimbursement checks, so replies always parse
+REIMBURSEMENT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "reimbursement",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "is_reimbursement": {"type": "boolean"},
+                "confidence": {"type": "number"},
+            },
+            "required": ["is_reimbursement", "confidence"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+def _is_transient_openai_error(exc: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying."""
+    if isinstance(exc, APIStatusError):
+        return is_transient_status(exc.status_code)
+    return isinstance(exc, APIConnectionError)
 
 
 class OpenAIProvider(BaseLLMProvider):
     """OpenAI provider for cloud-based LLM inference."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
+    # Whether the endpoint accepts OpenAI Batch API jobs
+    supports_batch_api = True
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o-mini",
+        max_concurrency: int = 20,
+        base_url: Optional[str] = None,
+    ):
         """
         Initialize OpenAI provider.
 
         Args:
             api_key: OpenAI API key
             model: Model name (e.g., 'gpt-4o-mini', 'gpt-3.5-turbo', 'gpt-4-turbo')
+            max_concurrency: Maximum in-flight requests, to stay within rate limits
+            base_url: API base URL; defaults to OpenAI's
         """
-        self.client = AsyncOpenAI(api_key=api_key)
+        # One HTTP/2 connection pool sized to the concurrency limit, so
+        # concurrent requests are multiplexed instead of opening new TLS sessions
+        self._http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=DEFAULT_TIMEOUT,
+        )
+        # Retries go through _call like the other services, so the SDK's own
+        # retry loop is turned off
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self._http_client,
+            max_retries=0,
+        )
         self.model = model
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _call(self, method: Callable[..., Awaitable[Any]], **kwargs) -> Any:
+        """Call an SDK method within the concurrency limit, retrying transient failures."""
+        async for attempt in retrying("openai", _is_transient_openai_error):
+            with attempt:
+                # Hold a slot per attempt, not across the backoff sleep
+                async with self._semaphore:
+                    return await method(**kwargs)
 
     async def generate_insight(self, prompt: str, transactions: List[Dict]) -> str:
         """Generate AI insight from transactions using OpenAI."""
-        # Format transactions for LLM
-        tx_text = "\n".join(
-            [
-                f"- {t.get('date')}: {t.get('merchant_name', 'Unknown')} (${t.get('amount', 0):.2f})"
-                for t in transactions
-            ]
+        response = await self._call(
+            self.client.chat.completions.create,
+            model=self.model,
+            messages=self._insight_messages(prompt, transactions),
+            temperature=0.7,
+            max_tokens=300,
         )
-
-        full_prompt = f"""{prompt}
-
-Transactions:
-{tx_text}
-
-Provide a concise analysis in 3-4 sentences."""
-
-        try:
-            response = await self.client.chat.completions.create(
+        return response.choices[0].message.content
+
+    async def stream_insight(
+        self, prompt: str, transactions: List[Dict]
+    ) -> AsyncIterator[str]:
+        """Stream AI insight tokens from OpenAI as they are generated."""
+        async with self._semaphore:
+            stream = await self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a financial analyst AI assistant. Provide clear, actionable insights.",
-                    },
-                    {"role": "user", "content": full_prompt},
-                ],
+                messages=self._insight_messages(prompt, transactions),
                 temperature=0.7,
                 max_tokens=300,
+                stream=True,
             )
-            return response.choices[0].message.content
-        except Exception as e:
-            return f"Error generating insight: {str(e)}"
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
 
-    async def categorize_transaction(self, transaction: Dict) -> str:
-        """Categorize a transaction using OpenAI."""
+    def _categorize_request(self, transaction: Dict) -> Dict:
+        """Build the chat completion parameters for categorizing one transaction."""
         prompt = f"""Categorize this transaction into ONE of these categories:
 Groceries, Dining Out, Transportation, Entertainment, Shopping,
 Bills & Utilities, Healthcare, Travel, Personal Care, Other
@@ -64,18 +125,76 @@ Description: {transaction.get('description', 'N/A')}
 
 Respond with ONLY the category name, nothing else."""
 
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.3,
+            "max_tokens": 20,
+        }
+
+    @cached_per_transaction("category")
+    async def categorize_transaction(self, transaction: Dict) -> str:
+        """Categorize a transaction using OpenAI."""
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=20,
+            response = await self._call(
+                self.client.chat.completions.create,
+                **self._categorize_request(transaction),
             )
             category = response.choices[0].message.content.strip()
             return category
         except Exception as e:
-            return "Other"
+            return Uncached("Other")
+
+    @cached_batch("category")
+    async def categorize_transactions_batch(self, transactions: List[Dict]) -> List[str]:
+        """Categorize a batch of transactions with a single OpenAI request."""
+        if not transactions:
+            return []
 
+        tx_lines = "\n".join(
+            [
+                f"{i}. {t.get('merchant_name', 'Unknown')} - ${t.get('amount', 0):.2f} ({t.get('description', 'N/A')})"
+                for i, t in enumerate(transactions, start=1)
+            ]
+        )
+
+        prompt = f"""Categorize each of these transactions into ONE of these categories:
+Groceries, Dining Out, Transportation, Entertainment, Shopping,
+Bills & Utilities, Healthcare, Travel, Personal Care, Other
+
+Transactions:
+{tx_lines}
+
+Respond with ONLY a JSON array of {len(transactions)} category names, in the same order as the transactions."""
+
+        try:
+            response = await self._call(
+                self.client.chat.completions.create,
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=20 * len(transactions),
+            )
+            categories = self._parse_category_list(
+                response.choices[0].message.content, len(transactions)
+            )
+            if categories is not None:
+                return categories
+        except Exception:
+            pass
+
+        # Fall back to categorizing one transaction at a time; those calls
+        # cache their own answers under the same keys
+        return [
+            Uncached(category)
+            for category in await super().categorize_transactions_batch(transactions)
+        ]
+
+    @cached_per_transaction(
+        "reimbursement",
+        with_description=True,
+        shortcut=BaseLLMProvider._reimbursement_fast_path,
+    )
     async def detect_reimbursement(self, transaction: Dict) -> tuple[bool, float]:
         """Detect if a transaction is a reimbursement using OpenAI."""
         description = transaction.get("description", "")
@@ -90,30 +209,33 @@ Amount: ${transaction.get('amount', 0):.2f}
 Look for keywords like: reimburse, paid back, split, venmo, zelle, repay, refund
 
 Respond in JSON format:
-{{"is_reimbursement": true/false, "confidence": 0.0-1.0, "reasoning": "brief explanation"}}"""
+{{"is_reimbursement": true/false, "confidence": 0.0-1.0}}"""
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await self._call(
+                self.client.chat.completions.create,
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
-                max_tokens=150,
+                max_tokens=60,
+                response_format=REIMBURSEMENT_RESPONSE_FORMAT,
             )
-            result = json.loads(response.choices[0].message.content)
-            return (result.get("is_reimbursement", False), result.get("confidence", 0.5))
+            result = self._parse_reimbursement(response.choices[0].message.content)
+            if result is not None:
+                return result
         except Exception:
-            # Fallback to keyword detection
-            keywords = [
-                "reimburse",
-                "paid back",
-                "split",
-                "venmo",
-                "zelle",
-                "repay",
-                "refund",
-            ]
-            text = f"{description} {merchant}".lower()
-            for keyword in keywords:
-                if keyword in text:
-                    return (True, 0.7)
-            return (False, 0.3)
+            pass
+
+        # Fallback to keyword detection
+        return Uncached(self._keyword_reimbursement(transaction))
+
+    async def warm_up(self) -> None:
+        """Open a connection to the API so the first request skips the TLS handshake."""
+        try:
+            await self._http_client.head(str(self.client.base_url))
+        except httpx.HTTPError as e:
+            logger.warning(f"OpenAI warm-up failed: {e}")
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
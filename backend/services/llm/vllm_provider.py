@@ -0,0 +1,37 @@
+"""vLLM provider implementation."""
+from .openai_provider import OpenAIProvider
+
+
+class VLLMProvider(OpenAIProvider):
+    """
+    Provider for a self-hosted vLLM server through its OpenAI-compatible API.
+
+    vLLM batches concurrent requests into shared forward passes, so bulk
+    categorization scales with max_concurrency far better than on Ollama.
+    """
+
+    # vLLM serves chat completions but not OpenAI's file-based Batch API
+    supports_batch_api = False
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:8000/v1",
+        api_key: str = "",
+        max_concurrency: int = 64,
+    ):
+        """
+        Initialize vLLM provider.
+
+        Args:
+            model: Model name served by vLLM (e.g., 'meta-llama/Meta-Llama-3-8B-Instruct')
+            base_url: OpenAI-compatible API base URL of the vLLM server
+            api_key: Key passed to the server's --api-key, if it sets one
+            max_concurrency: Maximum in-flight requests
+        """
+        super().__init__(
+            api_key=api_key or "EMPTY",
+            model=model,
+            max_concurrency=max_concurrency,
+            base_url=base_url,
+        )
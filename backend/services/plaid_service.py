@@ -10,14 +10,32 @@ from plaid.model.transactions_get_request import TransactionsGetRequest
 from plaid.model.transactions_get_request_options import TransactionsGetRequestOptions
 from plaid.model.country_code import CountryCode
 from plaid.model.products import Products
-from plaid import ApiClient, Configuration
+from plaid import ApiClient, ApiException, Configuration
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import AsyncIterator, Deque, List, Dict, Optional, Tuple
 from config import settings
+from services.retry import is_transient_status, retrying
+import asyncio
 import logging
+import time
+import urllib3
 
 logger = logging.getLogger(__name__)
 
+PAGE_SIZE = 500  # Plaid max per request
+PAGE_FETCH_CONCURRENCY = 4  # Plaid pages in flight during a sync
+ACCOUNTS_CACHE_TTL_SECONDS = 60
+ACCOUNTS_CACHE_MAX_SIZE = 128
+
+
+def _is_transient_plaid_error(exc: BaseException) -> bool:
+    """Connection failures, rate limits and Plaid server errors are worth retrying."""
+    if isinstance(exc, ApiException):
+        return is_transient_status(exc.status)
+    return isinstance(exc, urllib3.exceptions.HTTPError)
+
 
 class PlaidService:
     """Service for interacting with Plaid API."""
@@ -33,6 +51,7 @@ class PlaidService:
         )
         api_client = ApiClient(configuration)
         self.client = plaid_api.PlaidApi(api_client)
+        self._accounts_responses: Dict[str, Tuple[float, asyncio.Task]] = {}
 
     def _get_plaid_host(self) -> str:
         """Get Plaid API host based on environment."""
@@ -43,6 +62,41 @@ class PlaidService:
         }
         return env_map.get(settings.PLAID_ENV, "https://sandbox.plaid.com")
 
+    async def _call(self, method, request):
+        """Run a blocking Plaid SDK call in a worker thread, retrying transient failures."""
+        async for attempt in retrying("plaid", _is_transient_plaid_error):
+            with attempt:
+                return await asyncio.to_thread(method, request)
+
+    async def _accounts_get(self, access_token: str):
+        """
+        Call /accounts/get, sharing one response per access token for a short TTL.
+
+        Concurrent callers await the same in-flight request, so fetching the
+        accounts and the institution for a new item costs a single Plaid call.
+        """
+        cached = self._accounts_responses.get(access_token)
+        if cached is not None:
+            expires_at, task = cached
+            if expires_at > time.time() and task.get_loop() is asyncio.get_running_loop():
+                return await asyncio.shield(task)
+            del self._accounts_responses[access_token]
+
+        request = AccountsGetRequest(access_token=access_token)
+        task = asyncio.ensure_future(self._call(self.client.accounts_get, request))
+        if len(self._accounts_responses) >= ACCOUNTS_CACHE_MAX_SIZE:
+            self._accounts_responses.pop(next(iter(self._accounts_responses)))
+        self._accounts_responses[access_token] = (
+            time.time() + ACCOUNTS_CACHE_TTL_SECONDS,
+            task,
+        )
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # Don't serve a failed response to later callers
+            self._accounts_responses.pop(access_token, None)
+            raise
+
     async def create_link_token(self, user_id: str = "user-1") -> str:
         """
         Create a Link token for Plaid Link initialization.
@@ -61,7 +115,7 @@ class PlaidService:
                 country_codes=[CountryCode("US")],
                 language="en",
             )
-            response = self.client.link_token_create(request)
+            response = await self._call(self.client.link_token_create, request)
             return response["link_token"]
         except Exception as e:
             logger.error(f"Error creating link token: {e}")
@@ -79,7 +133,9 @@ class PlaidService:
         """
         try:
             request = ItemPublicTokenExchangeRequest(public_token=public_token)
-            response = self.client.item_public_token_exchange(request)
+            response = await self._call(
+                self.client.item_public_token_exchange, request
+            )
             return (response["access_token"], response["item_id"])
         except Exception as e:
             logger.error(f"Error exchanging public token: {e}")
@@ -96,8 +152,7 @@ class PlaidService:
             List of account dictionaries
         """
         try:
-            request = AccountsGetRequest(access_token=access_token)
-            response = self.client.accounts_get(request)
+            response = await self._accounts_get(access_token)
 
             accounts = []
             for account in response["accounts"]:
@@ -142,71 +197,164 @@ class PlaidService:
         Returns:
             List of transaction dictionaries
         """
+        all_transactions = []
+        async for page in self.iter_transactions(
+            access_token, start_date=start_date, end_date=end_date, account_ids=account_ids
+        ):
+            all_transactions.extend(page)
+
+        logger.info(f"Completed sync: {len(all_transactions)} transactions total")
+        return all_transactions
+
+    async def iter_transactions(
+        self,
+        access_token: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        account_ids: Optional[List[str]] = None,
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Fetch transactions from Plaid one page at a time.
+        Defaults to last 24 months if no date range specified.
+
+        Each page request runs in a worker thread. After the first page reports
+        the total, a window of up to PAGE_FETCH_CONCURRENCY later pages is
+        fetched at once, and pages are still yielded in offset order. If Plaid
+        returns a short page or the total changes mid-sync, the prefetches are
+        dropped and the rest is fetched one page at a time until the rows add
+        up to the total.
+
+        Args:
+            access_token: Plaid access token
+            start_date: Start date for transactions (defaults to 24 months ago)
+            end_date: End date for transactions (defaults to today)
+            account_ids: Optional list of specific account IDs to sync
+
+        Yields:
+            Lists of transaction dictionaries, one per Plaid page
+        """
         # Default to 24 months if not specified
         if end_date is None:
             end_date = datetime.now()
         if start_date is None:
             start_date = end_date - timedelta(days=730)  # 24 months
 
-        all_transactions = []
-        offset = 0
-        batch_size = 500  # Plaid max per request
-        has_more = True
-
         logger.info(
             f"Starting transaction sync from {start_date.date()} to {end_date.date()}"
         )
 
-        try:
-            while has_more:
-                request_options = TransactionsGetRequestOptions(
-                    count=batch_size,
-                    offset=offset,
-                )
+        async def fetch_page(offset: int) -> Dict:
+            request_options = TransactionsGetRequestOptions(
+                count=PAGE_SIZE,
+                offset=offset,
+            )
 
-                if account_ids:
-                    request_options.account_ids = account_ids
+            if account_ids:
+                request_options.account_ids = account_ids
 
-                request = TransactionsGetRequest(
-                    access_token=access_token,
-                    start_date=start_date.date(),
-                    end_date=end_date.date(),
-                    options=request_options,
-                )
+            request = TransactionsGetRequest(
+                access_token=access_token,
+                start_date=start_date.date(),
+                end_date=end_date.date(),
+                options=request_options,
+            )
+
+            response = await self._call(self.client.transactions_get, request)
+
+            logger.info(
+                f"Fetched {len(response['transactions'])} transactions "
+                f"(offset: {offset}, total: {response['total_transactions']})"
+            )
+            return response
 
-                response = self.client.transactions_get(request)
-                transactions = response["transactions"]
+        # Up to PAGE_FETCH_CONCURRENCY prefetched pages, oldest offset first
+        window: Deque[tuple[int, asyncio.Task]] = deque()
+
+        def discard_window() -> None:
+            """Cancel prefetches that will not be used, retrieving any errors."""
+            for _, task in window:
+                if task.done() and not task.cancelled():
+                    task.exception()
+                task.cancel()
+            window.clear()
+
+        try:
+            # The first page tells us the total, so the remaining offsets are
+            # known up front and can be fetched concurrently
+            first = await fetch_page(0)
+            total_transactions = first["total_transactions"]
+            received = len(first["transactions"])
+            offsets = iter(range(received, total_transactions, PAGE_SIZE))
+
+            def fill_window() -> None:
+                while len(window) < PAGE_FETCH_CONCURRENCY:
+                    offset = next(offsets, None)
+                    if offset is None:
+                        return
+                    window.append((offset, asyncio.create_task(fetch_page(offset))))
+
+            fill_window()
+            yield self._convert_transactions(first["transactions"])
+
+            # Yield in offset order even if a later page finishes first. After
+            # a short page the prefetched offsets no longer line up, so drop them
+            while window:
+                if window[0][0] != received:
+                    discard_window()
+                    break
+                # Await the head before refilling so at most
+                # PAGE_FETCH_CONCURRENCY pages are ever in flight
+                response = await window[0][1]
+                window.popleft()
+                fill_window()
+                total_transactions = response["total_transactions"]
+                received += len(response["transactions"])
+                yield self._convert_transactions(response["transactions"])
+
+            # Fetch any shortfall (a short page, or a total that grew during
+            # the sync) one page at a time from where the rows left off
+            while received < total_transactions:
+                response = await fetch_page(received)
+                if not response["transactions"]:
+                    break
                 total_transactions = response["total_transactions"]
+                received += len(response["transactions"])
+                yield self._convert_transactions(response["transactions"])
 
-                logger.info(
-                    f"Fetched {len(transactions)} transactions (offset: {offset}, total: {total_transactions})"
+            if received != total_transactions:
+                logger.warning(
+                    f"Plaid reported {total_transactions} transactions but returned {received}"
                 )
 
-                # Process transactions
-                for txn in transactions:
-                    all_transactions.append({
-                        "external_id": txn["transaction_id"],
-                        "plaid_account_id": txn["account_id"],
-                        "amount": float(txn["amount"]),
-                        "date": txn["date"],
-                        "merchant_name": txn.get("merchant_name") or txn.get("name"),
-                        "description": txn.get("name"),
-                        "category": (
-                            txn["category"][0] if txn.get("category") else None
-                        ),
-                        "pending": txn.get("pending", False),
-                    })
-
-                # Check if there are more transactions
-                offset += len(transactions)
-                has_more = offset < total_transactions
-
-            logger.info(f"Completed sync: {len(all_transactions)} transactions total")
-            return all_transactions
-
         except Exception as e:
             logger.error(f"Error syncing transactions: {e}")
             raise
+        finally:
+            discard_window()
+
+    @staticmethod
+    def _convert_transactions(transactions: List) -> List[Dict]:
+        """
+        Convert Plaid transaction objects to our transaction dictionaries.
+
+        Pages hold at most PAGE_SIZE rows, where a plain comprehension beats
+        building a DataFrame per page.
+        """
+        return [
+            {
+                "external_id": txn["transaction_id"],
+                "plaid_account_id": txn["account_id"],
+                "amount": float(txn["amount"]),
+                "date": txn["date"],
+                "merchant_name": txn.get("merchant_name") or txn.get("name"),
+                "description": txn.get("name"),
+                "category": (
+                    txn["category"][0] if txn.get("category") else None
+                ),
+                "pending": txn.get("pending", False),
+            }
+            for txn in transactions
+        ]
 
     async def get_institution_name(self, access_token: str) -> str:
         """
@@ -219,10 +367,22 @@ class PlaidService:
             Institution name
         """
         try:
-            request = AccountsGetRequest(access_token=access_token)
-            response = self.client.accounts_get(request)
+            response = await self._accounts_get(access_token)
             # The institution name is typically in the item metadata
             return response.get("item", {}).get("institution_id", "Unknown")
         except Exception as e:
             logger.error(f"Error getting institution: {e}")
             return "Unknown"
+
+
+@lru_cache(maxsize=1)
+def get_plaid_service() -> PlaidService:
+    """Return the shared PlaidService so its HTTP connection pool is reused."""
+    return PlaidService()
+
+
+def close_plaid_service() -> None:
+    """Close the shared PlaidService client; called on application shutdown."""
+    if get_plaid_service.cache_info().currsize:
+        get_plaid_service().client.api_client.close()
+        get_plaid_service.cache_clear()
@@ -0,0 +1,58 @@
+"""Retry policy for calls to external services."""
+from collections import Counter
+from typing import Callable, Optional
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+RETRY_ATTEMPTS = 5  # Total tries, including the first call
+RETRY_MIN_WAIT = 1  # Seconds
+RETRY_MAX_WAIT = 30  # Seconds
+
+# Retries per service since process start, e.g. retries_total["ollama"]
+retries_total: Counter = Counter()
+
+
+def is_transient_status(status: Optional[int]) -> bool:
+    """Return True for HTTP statuses worth retrying: rate limits and server errors."""
+    return status is not None and (status == 429 or status >= 500)
+
+
+def retrying(service: str, is_transient: Callable[[BaseException], bool]) -> AsyncRetrying:
+    """
+    Build a retry loop with exponential backoff and full jitter.
+
+    Use as:
+        async for attempt in retrying("plaid", is_transient):
+            with attempt:
+                ...
+
+    Args:
+        service: Name used for logging and the retries_total counter
+        is_transient: Predicate deciding whether an exception is worth retrying
+
+    Returns:
+        AsyncRetrying that re-raises the last error once attempts run out
+    """
+
+    def record_retry(retry_state: RetryCallState) -> None:
+        retries_total[service] += 1
+        logger.warning(
+            f"Retrying {service} call after attempt {retry_state.attempt_number}: "
+            f"{retry_state.outcome.exception()}"
+        )
+
+    return AsyncRetrying(
+        stop=stop_after_attempt(RETRY_ATTEMPTS),
+        wait=wait_random_exponential(min=RETRY_MIN_WAIT, max=RETRY_MAX_WAIT),
+        retry=retry_if_exception(is_transient),
+        before_sleep=record_retry,
+        reraise=True,
+    )
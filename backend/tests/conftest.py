@@ -1,42 +1,86 @@
 """Pytest configuration and fixtures."""
 import pytest
 import pytest_asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from pytest_asyncio import is_async_test
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import StaticPool
 from models.base import Base
 from database import get_db
 from main import app
+from services.cache import CacheService
+from services.llm import cache as llm_cache_module
 
 
 # Test database URL
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 
-@pytest_asyncio.fixture
+def pytest_collection_modifyitems(items):
+    """Run every async test in one session-wide event loop instead of one loop per test."""
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest.fixture(autouse=True)
+def isolated_llm_cache(monkeypatch):
+    """Keep cached LLM answers from leaking between tests or into Redis."""
+    monkeypatch.setattr(llm_cache_module, "cache", CacheService(url=""))
+    llm_cache_module.llm_cache._memory.clear()
+    yield
+    llm_cache_module.llm_cache._memory.clear()
+
+
+@pytest_asyncio.fixture(scope="session")
 async def test_engine():
-    """Create a test database engine."""
-    engine = create_async_engine(TEST_DATABASE_URL, echo=False)
+    """Create one shared in-memory database and its schema for the whole session."""
+    engine = create_async_engine(
+        TEST_DATABASE_URL,
+        echo=False,
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with the sqlite driver
+    @event.listens_for(engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
     yield engine
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-
     await engine.dispose()
 
 
 @pytest_asyncio.fixture
 async def test_session(test_engine):
-    """Create a test database session."""
-    async_session = async_sessionmaker(
-        test_engine, class_=AsyncSession, expire_on_commit=False
-    )
+    """
+    Create a test database session whose changes are rolled back afterwards.
+
+    The session joins an outer transaction and turns its own commits into
+    SAVEPOINTs, so tests can commit freely and still leave the schema empty.
+    """
+    async with test_engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
 
-    async with async_session() as session:
         yield session
 
+        await session.close()
+        await transaction.rollback()
+
 
 @pytest_asyncio.fixture
 async def test_client(test_session):
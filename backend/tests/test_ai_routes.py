@@ -0,0 +1,104 @@
+"""Tests for AI insight routes."""
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy import func, select
+from datetime import date
+from api.routes.ai import (
+    AnalyzeRequest,
+    analyze_spending,
+    analyze_spending_stream,
+    bulk_categorize_transactions,
+)
+from models.ai_insight import AIInsight
+from models.transaction import Transaction
+from models.user import User
+
+
+@pytest.fixture
+async def user(test_session):
+    """Store a user to attach insights to."""
+    user = User(email="test@example.com", username="tester", hashed_password="hashed")
+    test_session.add(user)
+    await test_session.commit()
+    return user
+
+
+@pytest.fixture
+def failing_llm():
+    """Patch the route's provider, cache and prompt building around a failing LLM."""
+    llm = AsyncMock(model="llama3")
+    llm.generate_insight.side_effect = RuntimeError("connection refused")
+
+    async def stream_insight(prompt, transactions):
+        yield "You spent "
+        raise RuntimeError("connection reset")
+
+    llm.stream_insight = stream_insight
+    with patch("api.routes.ai.get_llm_provider", return_value=llm), patch(
+        "api.routes.ai._prepare_analysis",
+        AsyncMock(return_value=(None, None, "Analyze spending", [])),
+    ), patch("api.routes.ai.cache") as mock_cache:
+        mock_cache.get = AsyncMock(return_value=None)
+        mock_cache.set = AsyncMock()
+        yield mock_cache
+
+
+@pytest.mark.asyncio
+async def test_analyze_does_not_keep_failed_insights(test_session, user, failing_llm):
+    """Test that an LLM failure is a 500 and is neither saved nor cached."""
+    with pytest.raises(HTTPException) as exc_info:
+        await analyze_spending(
+            AnalyzeRequest(), BackgroundTasks(), db=test_session, current_user=user
+        )
+
+    count = await test_session.execute(select(func.count(AIInsight.id)))
+    assert exc_info.value.status_code == 500
+    assert count.scalar() == 0
+    failing_llm.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_analyze_stream_does_not_keep_failed_insights(test_session, user, failing_llm):
+    """Test that a stream failing midway reports the error and is neither saved nor cached."""
+    with patch("api.routes.ai.AsyncSessionLocal") as mock_session_factory:
+        response = await analyze_spending_stream(
+            AnalyzeRequest(), db=test_session, current_user=user
+        )
+        chunks = [chunk async for chunk in response.body_iterator]
+
+    assert chunks[0] == "You spent "
+    assert chunks[-1].startswith("Error generating insight")
+    mock_session_factory.assert_not_called()
+    failing_llm.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_bulk_categorize_claims_rows_once(test_session, user):
+    """Test that back-to-back bulk requests never hand out the same transactions."""
+    test_session.add_all(
+        Transaction(
+            external_id=f"txn-{i}",
+            user_id=user.id,
+            amount=10.0,
+            date=date(2024, 1, 15),
+            source="manual",
+        )
+        for i in range(3)
+    )
+    await test_session.commit()
+
+    with patch("api.routes.ai.settings.CELERY_ENABLED", False):
+        first_tasks, second_tasks = BackgroundTasks(), BackgroundTasks()
+        first = await bulk_categorize_transactions(
+            first_tasks, limit=2, db=test_session, current_user=user
+        )
+        second = await bulk_categorize_transactions(
+            second_tasks, limit=2, db=test_session, current_user=user
+        )
+
+    first_ids, _ = first_tasks.tasks[0].args
+    second_ids, _ = second_tasks.tasks[0].args
+    assert first["count"] == 2
+    assert second["count"] == 1
+    assert not set(first_ids) & set(second_ids)
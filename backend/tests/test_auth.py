@@ -0,0 +1,102 @@
+"""Tests for authentication dependencies."""
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from fastapi import HTTPException
+from api.routes import auth
+from api.routes.auth import get_current_user, get_me, invalidate_user_cache
+from models.user import User
+from utils.security import create_access_token
+
+
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    """Start every test with an empty user cache."""
+    auth._user_cache.clear()
+    yield
+    auth._user_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_lookup(test_session):
+    """Test that repeated requests with the same token skip the DB lookup."""
+    user = User(email="test@example.com", username="tester", hashed_password="hashed")
+    test_session.add(user)
+    await test_session.commit()
+
+    token = create_access_token(data={"sub": user.id})
+
+    with patch.object(
+        auth.AuthService, "get_user_by_id", wraps=auth.AuthService(test_session).get_user_by_id
+    ) as mock_lookup:
+        first = await get_current_user(token=token, db=test_session)
+        second = await get_current_user(token=token, db=test_session)
+
+    assert first.id == second.id == user.id
+    assert mock_lookup.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_rejects_expired_token(test_session):
+    """Test that an expired token is rejected and not cached."""
+    token = create_access_token(data={"sub": "user-1"}, expires_delta=timedelta(minutes=-1))
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(token=token, db=test_session)
+
+    assert exc_info.value.status_code == 401
+    assert token not in auth._user_cache
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_cache_forces_fresh_lookup(test_session):
+    """Test that invalidating a user drops their cached tokens and only theirs."""
+    user = User(email="test@example.com", username="tester", hashed_password="hashed")
+    other = User(email="other@example.com", username="other", hashed_password="hashed")
+    test_session.add_all([user, other])
+    await test_session.commit()
+
+    token = create_access_token(data={"sub": user.id})
+    other_token = create_access_token(data={"sub": other.id})
+    await get_current_user(token=token, db=test_session)
+    await get_current_user(token=other_token, db=test_session)
+
+    invalidate_user_cache(user.id)
+
+    assert list(auth._user_cache) == [other_token]
+
+
+@pytest.mark.asyncio
+async def test_user_cache_evicts_least_recently_used(test_session):
+    """Test that a full cache evicts the token used longest ago, not the oldest insert."""
+    user = User(email="test@example.com", username="tester", hashed_password="hashed")
+    test_session.add(user)
+    await test_session.commit()
+
+    tokens = [create_access_token(data={"sub": user.id, "n": n}) for n in range(3)]
+    with patch.object(auth, "USER_CACHE_MAX_SIZE", 2):
+        await get_current_user(token=tokens[0], db=test_session)
+        await get_current_user(token=tokens[1], db=test_session)
+        # Touch the first token so the second becomes least recently used
+        await get_current_user(token=tokens[0], db=test_session)
+        await get_current_user(token=tokens[2], db=test_session)
+
+    assert list(auth._user_cache) == [tokens[0], tokens[2]]
+
+
+@pytest.mark.asyncio
+async def test_get_me_reads_current_profile(test_session):
+    """Test that /me returns the stored profile, not a cached copy."""
+    user = User(email="test@example.com", username="tester", hashed_password="hashed")
+    test_session.add(user)
+    await test_session.commit()
+
+    token = create_access_token(data={"sub": user.id})
+    current_user = await get_current_user(token=token, db=test_session)
+    user.full_name = "Renamed Tester"
+    await test_session.commit()
+
+    response = await get_me(current_user=current_user, db=test_session)
+
+    assert response.id == user.id
+    assert response.full_name == "Renamed Tester"
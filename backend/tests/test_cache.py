@@ -0,0 +1,95 @@
+"""Tests for the Redis-backed cache service."""
+import pytest
+from unittest.mock import AsyncMock
+from services.cache import CacheService
+
+
+def test_make_key_is_stable():
+    """Test that identical parts produce the same key."""
+    key_a = CacheService.make_key("ai_insight", "user-1", {"b": 2, "a": 1})
+    key_b = CacheService.make_key("ai_insight", "user-1", {"a": 1, "b": 2})
+
+    assert key_a == key_b
+    assert key_a.startswith("ai_insight:")
+    assert key_a != CacheService.make_key("ai_insight", "user-2", {"a": 1, "b": 2})
+
+
+@pytest.mark.asyncio
+async def test_cache_disabled_without_url():
+    """Test that an empty Redis URL turns the cache into a no-op."""
+    cache = CacheService(url="")
+
+    await cache.set("key", {"value": 1}, ttl=60)
+
+    assert cache.client is None
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_round_trip():
+    """Test storing and reading back a JSON value."""
+    cache = CacheService(url="")
+    store = {}
+    cache.client = AsyncMock()
+    cache.client.setex.side_effect = lambda key, ttl, value: store.__setitem__(key, value)
+    cache.client.get.side_effect = lambda key: store.get(key)
+
+    await cache.set("key", {"insight": "text"}, ttl=60)
+
+    assert await cache.get("key") == {"insight": "text"}
+    cache.client.setex.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_cache_errors_are_swallowed():
+    """Test that Redis errors are treated as cache misses."""
+    cache = CacheService(url="")
+    cache.client = AsyncMock()
+    cache.client.get.side_effect = ConnectionError("redis down")
+    cache.client.setex.side_effect = ConnectionError("redis down")
+
+    await cache.set("key", {"value": 1}, ttl=60)
+
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_incr():
+    """Test that incr bumps a counter and is a no-op without Redis."""
+    cache = CacheService(url="")
+    await cache.incr("version")
+
+    cache.client = AsyncMock()
+    await cache.incr("version")
+
+    cache.client.incr.assert_called_once_with("version")
+
+
+@pytest.mark.asyncio
+async def test_cache_delete():
+    """Test that delete removes a stored key."""
+    cache = CacheService(url="")
+    store = {"key": '{"value": 1}'}
+    cache.client = AsyncMock()
+    cache.client.get.side_effect = lambda key: store.get(key)
+    cache.client.delete.side_effect = lambda key: store.pop(key, None)
+
+    await cache.delete("key")
+
+    assert await cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_cache_get_many():
+    """Test that get_many reads several keys in one MGET, with None for misses."""
+    cache = CacheService(url="")
+    assert await cache.get_many(["a", "b"]) == [None, None]
+
+    cache.client = AsyncMock()
+    cache.client.mget.return_value = ['{"value": 1}', None]
+
+    assert await cache.get_many(["a", "b"]) == [{"value": 1}, None]
+    cache.client.mget.assert_called_once_with(["a", "b"])
+
+    cache.client.mget.side_effect = ConnectionError("redis down")
+    assert await cache.get_many(["a", "b"]) == [None, None]
@@ -1,15 +1,45 @@
 """Tests for LLM providers."""
+import asyncio
+import httpx
+import json
+import ollama
+import openai
 import pytest
-from unittest.mock import patch, AsyncMock, MagicMock
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import patch, AsyncMock
+from services.llm.base import keyword_hits
 from services.llm.ollama_provider import OllamaProvider
 from services.llm.openai_provider import OpenAIProvider
+from services.llm.vllm_provider import VLLMProvider
 from services.llm.factory import get_llm_provider
+from services.llm.batch_openai import OpenAIBatchCategorizer
+from services.llm.cache import llm_cache
+from services.cache import CacheService
+from services.retry import retries_total
+
+
+@contextmanager
+def patch_ollama_chat():
+    """Patch the Ollama async client and yield its chat method."""
+    with patch("services.llm.ollama_provider.ollama.AsyncClient", autospec=True) as MockClient:
+        yield MockClient.return_value.chat
+
+
+def _completion(content):
+    """Build a minimal chat completion response with one choice."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _chunk(content):
+    """Build a minimal streamed chat completion chunk."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
 
 
 @pytest.mark.asyncio
 async def test_ollama_generate_insight():
     """Test Ollama insight generation."""
-    with patch("services.llm.ollama_provider.ollama.chat") as mock_chat:
+    with patch_ollama_chat() as mock_chat:
         mock_chat.return_value = {
             "message": {"content": "You spent $500 on dining out this month."}
         }
@@ -27,10 +57,44 @@ async def test_ollama_generate_insight():
         mock_chat.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_ollama_generate_insight_raises_on_failure():
+    """Test that a failed insight call raises instead of returning error text."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.side_effect = RuntimeError("connection refused")
+
+        provider = OllamaProvider(model="llama3")
+
+        with pytest.raises(RuntimeError):
+            await provider.generate_insight("Analyze spending", [])
+
+
+@pytest.mark.asyncio
+async def test_ollama_stream_insight():
+    """Test Ollama insight streaming yields tokens as they arrive."""
+    with patch_ollama_chat() as mock_chat:
+
+        async def mock_stream():
+            for token in ["You spent ", "", "$500 ", "on dining out."]:
+                yield {"message": {"content": token}}
+
+        mock_chat.return_value = mock_stream()
+
+        provider = OllamaProvider(model="llama3")
+        transactions = [
+            {"date": "2024-01-15", "merchant_name": "Restaurant", "amount": 50.0}
+        ]
+
+        chunks = [chunk async for chunk in provider.stream_insight("Analyze spending", transactions)]
+
+        assert chunks == ["You spent ", "$500 ", "on dining out."]
+        assert mock_chat.call_args.kwargs["stream"] is True
+
+
 @pytest.mark.asyncio
 async def test_ollama_categorize_transaction():
     """Test Ollama transaction categorization."""
-    with patch("services.llm.ollama_provider.ollama.chat") as mock_chat:
+    with patch_ollama_chat() as mock_chat:
         mock_chat.return_value = {"message": {"content": "Dining Out"}}
 
         provider = OllamaProvider(model="llama3")
@@ -49,7 +113,7 @@ async def test_ollama_categorize_transaction():
 @pytest.mark.asyncio
 async def test_ollama_detect_reimbursement():
     """Test Ollama reimbursement detection."""
-    with patch("services.llm.ollama_provider.ollama.chat") as mock_chat:
+    with patch_ollama_chat() as mock_chat:
         mock_chat.return_value = {
             "message": {
                 "content": '{"is_reimbursement": true, "confidence": 0.9, "reasoning": "Contains keyword reimburse"}'
@@ -58,7 +122,7 @@ async def test_ollama_detect_reimbursement():
 
         provider = OllamaProvider(model="llama3")
         transaction = {
-            "merchant_name": "Venmo",
+            "merchant_name": "Transfer From John",
             "amount": 50.0,
             "description": "Reimburse for dinner",
         }
@@ -67,18 +131,19 @@ async def test_ollama_detect_reimbursement():
 
         assert is_reimbursement is True
         assert confidence == 0.9
+        assert mock_chat.call_args.kwargs["format"] == "json"
 
 
 @pytest.mark.asyncio
 async def test_ollama_detect_reimbursement_fallback():
     """Test Ollama reimbursement detection fallback to keyword matching."""
-    with patch("services.llm.ollama_provider.ollama.chat") as mock_chat:
+    with patch_ollama_chat() as mock_chat:
         # Simulate JSON parse error
         mock_chat.return_value = {"message": {"content": "invalid json"}}
 
         provider = OllamaProvider(model="llama3")
         transaction = {
-            "merchant_name": "Venmo",
+            "merchant_name": "Transfer From John",
             "amount": 50.0,
             "description": "paid back for dinner",
         }
@@ -90,16 +155,330 @@ async def test_ollama_detect_reimbursement_fallback():
         assert confidence == 0.7
 
 
+@pytest.mark.asyncio
+async def test_ollama_detect_reimbursement_wrapped_reply():
+    """Test that a JSON reply wrapped in prose is parsed instead of falling back."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.return_value = {
+            "message": {
+                "content": 'Here is my answer:\n```json\n{"is_reimbursement": false, "confidence": 0.85}\n```'
+            }
+        }
+
+        provider = OllamaProvider(model="llama3")
+        transaction = {
+            "merchant_name": "Transfer From John",
+            "amount": 50.0,
+            "description": "Refund for concert tickets",
+        }
+
+        is_reimbursement, confidence = await provider.detect_reimbursement(transaction)
+
+        assert is_reimbursement is False
+        assert confidence == 0.85
+
+
+@pytest.mark.asyncio
+async def test_ollama_retries_transient_errors():
+    """Test that an overloaded Ollama server is retried before falling back."""
+    with patch_ollama_chat() as mock_chat, patch("services.retry.RETRY_MIN_WAIT", 0), patch(
+        "services.retry.RETRY_MAX_WAIT", 0
+    ):
+        mock_chat.side_effect = [
+            ollama.ResponseError("server busy", status_code=503),
+            {"message": {"content": "Dining Out"}},
+        ]
+
+        provider = OllamaProvider(model="llama3")
+        retries_before = retries_total["ollama"]
+
+        category = await provider.categorize_transaction({"merchant_name": "Bistro"})
+
+        assert category == "Dining Out"
+        assert mock_chat.call_count == 2
+        assert retries_total["ollama"] == retries_before + 1
+
+
+@pytest.mark.asyncio
+async def test_ollama_backoff_frees_concurrency_slot():
+    """Test that a request waiting to retry lets other requests use its slot."""
+    calls = []
+
+    async def chat(model, messages):
+        merchant = "Bistro" if "Bistro" in messages[0]["content"] else "Cafe"
+        calls.append(merchant)
+        if calls == ["Bistro"]:
+            raise ollama.ResponseError("server busy", status_code=503)
+        return {"message": {"content": "Dining Out"}}
+
+    with patch_ollama_chat() as mock_chat, patch("services.retry.RETRY_MIN_WAIT", 0.1), patch(
+        "services.retry.RETRY_MAX_WAIT", 0.1
+    ):
+        mock_chat.side_effect = chat
+        provider = OllamaProvider(model="llama3", max_concurrency=1)
+
+        await asyncio.gather(
+            provider.categorize_transaction({"merchant_name": "Bistro"}),
+            provider.categorize_transaction({"merchant_name": "Cafe"}),
+        )
+
+    # Cafe runs during Bistro's backoff instead of queueing behind its retry
+    assert calls == ["Bistro", "Cafe", "Bistro"]
+
+
+@pytest.mark.asyncio
+async def test_detect_reimbursement_p2p_fast_path():
+    """Test that keyword hits on peer-to-peer merchants skip the LLM."""
+    with patch_ollama_chat() as mock_chat:
+        provider = OllamaProvider(model="llama3")
+        transaction = {
+            "merchant_name": "Venmo",
+            "amount": 50.0,
+            "description": "paid back for dinner",
+        }
+
+        is_reimbursement, confidence = await provider.detect_reimbursement(transaction)
+
+        assert is_reimbursement is True
+        assert confidence == 0.95
+        mock_chat.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_reimbursement_cache_keys_on_description():
+    """Test that same merchant and amount with different descriptions are answered separately."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.return_value = {
+            "message": {"content": '{"is_reimbursement": false, "confidence": 0.9}'}
+        }
+        provider = OllamaProvider(model="llama3")
+
+        pizza = await provider.detect_reimbursement(
+            {"merchant_name": "PayPal", "amount": 20.0, "description": "pizza"}
+        )
+        paid_back = await provider.detect_reimbursement(
+            {"merchant_name": "PayPal", "amount": 20.0, "description": "paid back"}
+        )
+        # No merchant: only the description tells these apart
+        await provider.detect_reimbursement({"amount": 20.0, "description": "Groceries"})
+        await provider.detect_reimbursement({"amount": 20.0, "description": "Concert tickets"})
+
+        assert pizza == (False, 0.9)
+        assert paid_back == (True, 0.95)
+        assert mock_chat.call_count == 3
+
+
+def test_keyword_hits():
+    """Test batch reimbursement keyword flags, case-insensitively."""
+    hits = keyword_hits(
+        [
+            {"merchant_name": "Venmo", "description": None},
+            {"merchant_name": "Transfer", "description": "PAID BACK for tickets"},
+            {"merchant_name": "Starbucks", "description": "Coffee"},
+            {},
+        ]
+    )
+
+    assert hits == [True, True, False, False]
+
+
+@pytest.mark.asyncio
+async def test_ollama_categorize_transactions_batch():
+    """Test Ollama batch categorization with a single request."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.return_value = {"message": {"content": '["Dining Out", "Transportation"]'}}
+
+        provider = OllamaProvider(model="llama3")
+        transactions = [
+            {"merchant_name": "Starbucks", "amount": 5.50, "description": "Coffee"},
+            {"merchant_name": "Uber", "amount": 20.0, "description": "Ride"},
+        ]
+
+        categories = await provider.categorize_transactions_batch(transactions)
+
+        assert categories == ["Dining Out", "Transportation"]
+        mock_chat.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_ollama_categorize_transactions_batch_fallback():
+    """Test Ollama batch categorization falls back to per-transaction calls."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.side_effect = [
+            {"message": {"content": "invalid json"}},
+            {"message": {"content": "Dining Out"}},
+            {"message": {"content": "Transportation"}},
+        ]
+
+        provider = OllamaProvider(model="llama3")
+        transactions = [
+            {"merchant_name": "Starbucks", "amount": 5.50, "description": "Coffee"},
+            {"merchant_name": "Uber", "amount": 20.0, "description": "Ride"},
+        ]
+
+        categories = await provider.categorize_transactions_batch(transactions)
+
+        assert categories == ["Dining Out", "Transportation"]
+        assert mock_chat.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_categorization_reuses_cached_merchants():
+    """Test that repeated merchants are answered from the cache."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.side_effect = [
+            {"message": {"content": "Dining Out"}},
+            {"message": {"content": '["Transportation"]'}},
+        ]
+
+        provider = OllamaProvider(model="llama3")
+        first = await provider.categorize_transaction(
+            {"merchant_name": "Starbucks", "amount": 5.50}
+        )
+        categories = await provider.categorize_transactions_batch(
+            [
+                {"merchant_name": "STARBUCKS ", "amount": 5.75},
+                {"merchant_name": "Uber", "amount": 20.0},
+            ]
+        )
+
+    assert first == "Dining Out"
+    assert categories == ["Dining Out", "Transportation"]
+    assert mock_chat.call_count == 2
+    assert "Uber" in mock_chat.call_args.kwargs["messages"][0]["content"]
+    assert "Starbucks" not in mock_chat.call_args.kwargs["messages"][0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_batch_reads_redis_in_one_round_trip(monkeypatch):
+    """Test that a batch checks process memory first, then fetches the rest with one MGET."""
+    redis_cache = CacheService(url="")
+    redis_cache.client = AsyncMock()
+    monkeypatch.setattr("services.llm.cache.cache", redis_cache)
+
+    with patch_ollama_chat() as mock_chat:
+        provider = OllamaProvider(model="llama3")
+        starbucks = {"merchant_name": "Starbucks", "amount": 5.50}
+        uber = {"merchant_name": "Uber", "amount": 20.0}
+        lyft = {"merchant_name": "Lyft", "amount": 18.0}
+        await llm_cache.set(llm_cache.make_key("category", "llama3", starbucks), "Dining Out")
+        redis_cache.client.mget.return_value = ['"Transportation"', '"Transportation"']
+
+        categories = await provider.categorize_transactions_batch([starbucks, uber, lyft])
+
+    assert categories == ["Dining Out", "Transportation", "Transportation"]
+    redis_cache.client.mget.assert_called_once_with(
+        [llm_cache.make_key("category", "llama3", txn) for txn in (uber, lyft)]
+    )
+    redis_cache.client.get.assert_not_called()
+    mock_chat.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fallback_answers_are_not_cached():
+    """Test that a real "Other" is cached but the fallback after a failed call is not."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.side_effect = [
+            {"message": {"content": "Other"}},
+            RuntimeError("connection refused"),
+            {"message": {"content": "Dining Out"}},
+        ]
+
+        provider = OllamaProvider(model="llama3")
+        gift_shop = {"merchant_name": "Gift Shop", "amount": 15.0}
+        bistro = {"merchant_name": "Bistro", "amount": 30.0}
+
+        assert await provider.categorize_transaction(gift_shop) == "Other"
+        assert await provider.categorize_transaction(gift_shop) == "Other"
+        assert await provider.categorize_transaction(bistro) == "Other"
+        assert await provider.categorize_transaction(bistro) == "Dining Out"
+
+    assert mock_chat.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicate_requests_share_one_call():
+    """Test that identical in-flight categorizations make a single LLM call."""
+    with patch_ollama_chat() as mock_chat:
+
+        async def slow_chat(**kwargs):
+            await asyncio.sleep(0.01)
+            if "JSON array" in kwargs["messages"][0]["content"]:
+                return {"message": {"content": '["Transportation"]'}}
+            return {"message": {"content": "Dining Out"}}
+
+        mock_chat.side_effect = slow_chat
+
+        provider = OllamaProvider(model="llama3")
+        categories = await asyncio.gather(
+            *(
+                provider.categorize_transaction({"merchant_name": "Starbucks", "amount": 5.5})
+                for _ in range(5)
+            )
+        )
+        batch = await provider.categorize_transactions_batch(
+            [{"merchant_name": "Uber", "amount": 20.0}] * 3
+        )
+
+    assert categories == ["Dining Out"] * 5
+    assert batch == ["Transportation"] * 3
+    assert mock_chat.call_count == 2
+    assert "Uber" in mock_chat.call_args.kwargs["messages"][0]["content"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    """Test that cancelling the first caller leaves a waiting duplicate its answer."""
+    with patch_ollama_chat() as mock_chat:
+
+        async def slow_chat(**kwargs):
+            await asyncio.sleep(0.02)
+            return {"message": {"content": "Dining Out"}}
+
+        mock_chat.side_effect = slow_chat
+
+        provider = OllamaProvider(model="llama3")
+        transaction = {"merchant_name": "Starbucks", "amount": 5.5}
+        leader = asyncio.create_task(provider.categorize_transaction(transaction))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(provider.categorize_transaction(transaction))
+        await asyncio.sleep(0.005)
+
+        leader.cancel()
+
+        assert await follower == "Dining Out"
+        assert leader.cancelled()
+        mock_chat.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_ollama_categorize_transactions_batch_fenced_reply():
+    """Test Ollama batch categorization accepts an array wrapped in prose."""
+    with patch_ollama_chat() as mock_chat:
+        mock_chat.return_value = {
+            "message": {"content": 'Here you go:\n```json\n["Dining Out", "Transportation"]\n```'}
+        }
+
+        provider = OllamaProvider(model="llama3")
+        transactions = [
+            {"merchant_name": "Starbucks", "amount": 5.50, "description": "Coffee"},
+            {"merchant_name": "Uber", "amount": 20.0, "description": "Ride"},
+        ]
+
+        categories = await provider.categorize_transactions_batch(transactions)
+
+        assert categories == ["Dining Out", "Transportation"]
+        mock_chat.assert_called_once()
+
+
 @pytest.mark.asyncio
 async def test_openai_generate_insight():
     """Test OpenAI insight generation."""
     with patch("services.llm.openai_provider.AsyncOpenAI") as MockClient:
         mock_instance = MockClient.return_value
-        mock_response = MagicMock()
-        mock_response.choices = [
-            MagicMock(message=MagicMock(content="You spent $500 on dining out."))
-        ]
-        mock_instance.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_instance.chat.completions.create = AsyncMock(
+            return_value=_completion("You spent $500 on dining out.")
+        )
 
         provider = OpenAIProvider(api_key="test-key", model="gpt-4o-mini")
         transactions = [
@@ -112,14 +491,35 @@ async def test_openai_generate_insight():
         mock_instance.chat.completions.create.assert_called_once()
 
 
+
+@pytest.mark.asyncio
+async def test_openai_stream_insight():
+    """Test OpenAI insight streaming yields tokens as they arrive."""
+    with patch("services.llm.openai_provider.AsyncOpenAI") as MockClient:
+        mock_instance = MockClient.return_value
+
+        async def mock_stream():
+            for token in ["You spent ", "$500 ", None, "on dining out."]:
+                yield _chunk(token)
+
+        mock_instance.chat.completions.create = AsyncMock(return_value=mock_stream())
+
+        provider = OpenAIProvider(api_key="test-key", model="gpt-4o-mini")
+        transactions = [
+            {"date": "2024-01-15", "merchant_name": "Restaurant", "amount": 50.0}
+        ]
+
+        chunks = [chunk async for chunk in provider.stream_insight("Analyze spending", transactions)]
+
+        assert chunks == ["You spent ", "$500 ", "on dining out."]
+        assert mock_instance.chat.completions.create.call_args.kwargs["stream"] is True
+
 @pytest.mark.asyncio
 async def test_openai_categorize_transaction():
     """Test OpenAI transaction categorization."""
     with patch("services.llm.openai_provider.AsyncOpenAI") as MockClient:
         mock_instance = MockClient.return_value
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock(message=MagicMock(content="Dining Out"))]
-        mock_instance.chat.completions.create = AsyncMock(return_value=mock_response)
+        mock_instance.chat.completions.create = AsyncMock(return_value=_completion("Dining Out"))
 
         provider = OpenAIProvider(api_key="test-key", model="gpt-4o-mini")
         transaction = {
@@ -134,12 +534,65 @@ async def test_openai_categorize_transaction():
         mock_instance.chat.completions.create.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_openai_retries_rate_limited_calls():
+    """Test that OpenAI rate limits go through the shared retry policy, not the SDK's."""
+    rate_limited = openai.RateLimitError(
+        "rate limited",
+        response=httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com")),
+        body=None,
+    )
+    with patch("services.llm.openai_provider.AsyncOpenAI") as MockClient, patch(
+        "services.retry.RETRY_MIN_WAIT", 0
+    ), patch("services.retry.RETRY_MAX_WAIT", 0):
+        mock_instance = MockClient.return_value
+        mock_instance.chat.completions.create = AsyncMock(
+            side_effect=[rate_limited, _completion("Dining Out")]
+        )
+
+        provider = OpenAIProvider(api_key="test-key", model="gpt-4o-mini")
+        retries_before = retries_total["openai"]
+
+        category = await provider.categorize_transaction({"merchant_name": "Trattoria"})
+
+        assert category == "Dining Out"
+        assert mock_instance.chat.completions.create.call_count == 2
+        assert retries_total["openai"] == retries_before + 1
+        assert MockClient.call_args.kwargs["max_retries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_openai_detect_reimbursement_uses_json_schema():
+    """Test that OpenAI reimbursement checks request structured JSON output."""
+    with patch("services.llm.openai_provider.AsyncOpenAI") as MockClient:
+        mock_instance = MockClient.return_value
+        mock_instance.chat.completions.create = AsyncMock(
+            return_value=_completion('{"is_reimbursement": true, "confidence": 0.8}')
+        )
+
+        provider = OpenAIProvider(api_key="test-key", model="gpt-4o-mini")
+        transaction = {
+            "merchant_name": "Transfer From John",
+            "amount": 50.0,
+            "description": "Dinner split",
+        }
+
+        result = await provider.detect_reimbursement(transaction)
+
+        assert result == (True, 0.8)
+        response_format = mock_instance.chat.completions.create.call_args.kwargs[
+            "response_format"
+        ]
+        assert response_format["type"] == "json_schema"
+
+
 def test_llm_factory_ollama():
     """Test LLM factory with Ollama provider."""
     with patch("services.llm.factory.settings") as mock_settings:
         mock_settings.LLM_PROVIDER = "ollama"
         mock_settings.OLLAMA_MODEL = "llama3"
         mock_settings.OLLAMA_BASE_URL = "http://localhost:11434"
+        mock_settings.OLLAMA_MAX_CONCURRENCY = 4
 
         provider = get_llm_provider()
 
@@ -153,6 +606,7 @@ def test_llm_factory_openai():
         mock_settings.LLM_PROVIDER = "openai"
         mock_settings.OPENAI_API_KEY = "test-key"
         mock_settings.OPENAI_MODEL = "gpt-4o-mini"
+        mock_settings.OPENAI_MAX_CONCURRENCY = 20
 
         provider = get_llm_provider()
 
@@ -160,6 +614,23 @@ def test_llm_factory_openai():
         assert provider.model == "gpt-4o-mini"
 
 
+def test_llm_factory_vllm():
+    """Test LLM factory with a vLLM server behind the OpenAI-compatible API."""
+    with patch("services.llm.factory.settings") as mock_settings:
+        mock_settings.LLM_PROVIDER = "vllm"
+        mock_settings.VLLM_MODEL = "meta-llama/Meta-Llama-3-8B-Instruct"
+        mock_settings.VLLM_BASE_URL = "http://vllm:8000/v1"
+        mock_settings.VLLM_API_KEY = ""
+        mock_settings.VLLM_MAX_CONCURRENCY = 64
+
+        provider = get_llm_provider()
+
+        assert isinstance(provider, VLLMProvider)
+        assert provider.model == "meta-llama/Meta-Llama-3-8B-Instruct"
+        assert str(provider.client.base_url) == "http://vllm:8000/v1/"
+        assert provider.supports_batch_api is False
+
+
 def test_llm_factory_invalid_provider():
     """Test LLM factory with invalid provider."""
     with patch("services.llm.factory.settings") as mock_settings:
@@ -177,3 +648,103 @@ def test_llm_factory_openai_missing_key():
 
         with pytest.raises(ValueError, match="OPENAI_API_KEY is required"):
             get_llm_provider()
+
+
+def test_llm_factory_reuses_provider():
+    """Test that the factory returns the same provider for the same settings."""
+    with patch("services.llm.factory.settings") as mock_settings:
+        mock_settings.LLM_PROVIDER = "ollama"
+        mock_settings.OLLAMA_MODEL = "mistral"
+        mock_settings.OLLAMA_BASE_URL = "http://localhost:11434"
+        mock_settings.OLLAMA_MAX_CONCURRENCY = 4
+
+        first = get_llm_provider()
+        second = get_llm_provider()
+
+        mock_settings.OLLAMA_MODEL = "llama3"
+        third = get_llm_provider()
+
+    assert first is second
+    assert third is not first
+
+
+@pytest.mark.asyncio
+async def test_openai_limits_concurrent_requests():
+    """Test that OpenAI requests are capped at max_concurrency in flight."""
+    in_flight = 0
+    peak = 0
+
+    async def fake_create(**kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return _completion("Other")
+
+    with patch("services.llm.openai_provider.AsyncOpenAI") as mock_client:
+        mock_client.return_value.chat.completions.create = fake_create
+
+        provider = OpenAIProvider(api_key="test-key", max_concurrency=2)
+        categories = await asyncio.gather(
+            *(provider.categorize_transaction({"merchant_name": f"Shop {i}"}) for i in range(6))
+        )
+
+    assert categories == ["Other"] * 6
+    assert peak == 2
+
+
+def test_openai_batch_round_trip():
+    """Test building Batch API requests and parsing the output file."""
+    with patch("services.llm.openai_provider.AsyncOpenAI"):
+        categorizer = OpenAIBatchCategorizer(OpenAIProvider(api_key="test-key"))
+
+    requests = [
+        json.loads(line)
+        for line in categorizer.build_requests(
+            [{"id": "txn-1", "merchant_name": "Starbucks", "amount": 5.50}]
+        ).splitlines()
+    ]
+    assert requests[0]["custom_id"] == "txn-1"
+    assert requests[0]["url"] == "/v1/chat/completions"
+    assert requests[0]["body"]["model"] == "gpt-4o-mini"
+
+    output = "\n".join(
+        [
+            json.dumps(
+                {
+                    "custom_id": "txn-1",
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"content": " Dining Out\n"}}]},
+                    },
+                }
+            ),
+            json.dumps({"custom_id": "txn-2", "response": {"status_code": 500, "body": {}}}),
+        ]
+    )
+    assert OpenAIBatchCategorizer.parse_results(output) == {"txn-1": "Dining Out"}
+
+
+
+@pytest.mark.asyncio
+async def test_openai_uses_shared_http_client():
+    """Test that the OpenAI client reuses the provider's httpx client and closes it."""
+    provider = OpenAIProvider(api_key="test-key", max_concurrency=5)
+
+    assert provider.client._client is provider._http_client
+
+    await provider.close()
+    assert provider._http_client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_ollama_closes_owned_transport():
+    """Test that the Ollama client uses the provider's transport and close releases it."""
+    provider = OllamaProvider(model="llama3", max_concurrency=2)
+
+    assert provider.client._client._transport is provider._transport
+
+    with patch.object(provider._transport, "aclose", AsyncMock()) as mock_aclose:
+        await provider.close()
+    mock_aclose.assert_awaited_once()
@@ -5,7 +5,9 @@ from models.account import Account
 from models.transaction import Transaction
 from models.ai_insight import AIInsight
 from models.plaid_item import PlaidItem
-from sqlalchemy import select
+from models.user import User
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
 
 
 @pytest.mark.asyncio
@@ -117,8 +119,12 @@ async def test_create_plaid_item(test_session):
 @pytest.mark.asyncio
 async def test_account_transaction_relationship(test_session):
     """Test the relationship between Account and Transaction."""
-    # Create account
+    # Create the owning user and account
+    user = User(email="test@example.com", username="tester", hashed_password="hashed")
+    test_session.add(user)
+    await test_session.flush()
     account = Account(
+        user_id=user.id,
         plaid_account_id="test_account_123",
         account_name="Test Credit Card",
         account_type="credit",
@@ -126,22 +132,29 @@ async def test_account_transaction_relationship(test_session):
     test_session.add(account)
     await test_session.commit()
 
-    # Create multiple transactions
-    for i in range(3):
-        transaction = Transaction(
-            external_id=f"txn_{i}",
-            account_id=account.id,
-            amount=100.0 + i,
-            date=date(2024, 1, i + 1),
-            merchant_name=f"Merchant {i}",
-            source="plaid",
-        )
-        test_session.add(transaction)
+    # Create multiple transactions in one bulk INSERT
+    await test_session.execute(
+        insert(Transaction),
+        [
+            {
+                "external_id": f"txn_{i}",
+                "account_id": account.id,
+                "user_id": user.id,
+                "amount": 100.0 + i,
+                "date": date(2024, 1, i + 1),
+                "merchant_name": f"Merchant {i}",
+                "source": "plaid",
+            }
+            for i in range(3)
+        ],
+    )
     await test_session.commit()
 
-    # Query account with transactions
+    # Query account with transactions; async sessions can't lazy-load
     result = await test_session.execute(
-        select(Account).where(Account.id == account.id)
+        select(Account)
+        .where(Account.id == account.id)
+        .options(selectinload(Account.transactions))
     )
     db_account = result.scalar_one()
 
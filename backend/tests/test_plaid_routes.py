@@ -0,0 +1,57 @@
+"""Tests for Plaid route helpers."""
+import pytest
+from datetime import date
+from sqlalchemy import func, select
+from api.routes.plaid import _insert_new_transactions
+from models.account import Account
+from models.transaction import Transaction
+from models.user import User
+
+
+def _rows(user_id, account_id, external_ids):
+    """Build transaction rows in the shape the sync consumer inserts."""
+    return [
+        {
+            "external_id": external_id,
+            "account_id": account_id,
+            "user_id": user_id,
+            "amount": 12.5,
+            "date": date(2024, 1, 15),
+            "merchant_name": "Merchant",
+            "description": "Purchase",
+            "category": "Shopping",
+            "source": "plaid",
+        }
+        for external_id in external_ids
+    ]
+
+
+@pytest.mark.asyncio
+async def test_insert_new_transactions_skips_existing(test_session):
+    """Test that the bulk insert skips stored external_ids and returns only new ones."""
+    user = User(email="test@example.com", username="tester", hashed_password="hashed")
+    test_session.add(user)
+    await test_session.flush()
+    account = Account(
+        user_id=user.id,
+        plaid_account_id="acc-123",
+        account_name="Test Credit Card",
+        account_type="credit",
+    )
+    test_session.add(account)
+    await test_session.commit()
+
+    insert_stmt = _insert_new_transactions(test_session.bind.dialect.name)
+
+    first = await test_session.execute(
+        insert_stmt, _rows(user.id, account.id, ["txn-1", "txn-2"])
+    )
+    assert sorted(first.scalars().all()) == ["txn-1", "txn-2"]
+
+    second = await test_session.execute(
+        insert_stmt, _rows(user.id, account.id, ["txn-2", "txn-3"])
+    )
+    assert second.scalars().all() == ["txn-3"]
+
+    count = await test_session.execute(select(func.count(Transaction.id)))
+    assert count.scalar() == 3
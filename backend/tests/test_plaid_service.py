@@ -1,47 +1,99 @@
 """Tests for Plaid service."""
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
-from datetime import datetime, timedelta
+import threading
+import time
+from unittest.mock import patch
+from datetime import date, datetime
+from plaid import ApiException
 from services.plaid_service import PlaidService
 
+# Rows differ only in their per-transaction fields, so each one merges onto
+# a shared base
+_BASE = {"account_id": "acc-123", "category": ["Food and Drink"], "pending": False}
 
-@pytest.mark.asyncio
-async def test_create_link_token():
-    """Test creating a Plaid link token."""
-    with patch("services.plaid_service.plaid_api.PlaidApi") as MockPlaidApi:
-        mock_client = MockPlaidApi.return_value
-        mock_client.link_token_create.return_value = {"link_token": "link-test-token"}
 
-        service = PlaidService()
-        link_token = await service.create_link_token(user_id="test-user")
+def _page(ids, txn_date, total):
+    """Build one transactions_get response holding the given transaction ids."""
+    return {
+        "transactions": [
+            _BASE | {
+                "transaction_id": f"txn-{i}",
+                "amount": 50.0 + i,
+                "date": txn_date,
+                "merchant_name": f"Merchant {i}",
+                "name": f"Purchase {i}",
+            }
+            for i in ids
+        ],
+        "total_transactions": total,
+    }
 
-        assert link_token == "link-test-token"
-        mock_client.link_token_create.assert_called_once()
 
+# (page size, Plaid pages) for the pagination test, built once at import; the
+# service only reads them, so every run can share the same objects. Small
+# pages cover the paging loop, and one case keeps Plaid's real page size.
+PAGINATION_CASES = [
+    pytest.param(
+        2,
+        [_page(range(2), "2024-01-15", 4), _page(range(2, 4), "2024-01-16", 4)],
+        id="small_pages",
+    ),
+    pytest.param(
+        500,
+        [_page(range(500), "2024-01-15", 750), _page(range(500, 750), "2024-01-16", 750)],
+        id="plaid_page_size",
+    ),
+]
 
-@pytest.mark.asyncio
-async def test_exchange_public_token():
-    """Test exchanging public token for access token."""
-    with patch("services.plaid_service.plaid_api.PlaidApi") as MockPlaidApi:
-        mock_client = MockPlaidApi.return_value
-        mock_client.item_public_token_exchange.return_value = {
-            "access_token": "access-test-token",
-            "item_id": "item-123",
-        }
 
-        service = PlaidService()
-        access_token, item_id = await service.exchange_public_token("public-token")
+@pytest.fixture(scope="module")
+def mock_plaid_api():
+    """
+    Patch the Plaid API client once for the whole module.
 
-        assert access_token == "access-test-token"
-        assert item_id == "item-123"
+    The SDK is synchronous and PlaidService runs it in worker threads, so the
+    client stays a plain (not async) mock, specced against the real API class
+    so calls to methods or arguments it doesn't have fail loudly.
+    """
+    with patch("services.plaid_service.plaid_api.PlaidApi", autospec=True) as MockPlaidApi:
+        yield MockPlaidApi.return_value
 
 
-@pytest.mark.asyncio
-async def test_get_accounts():
-    """Test getting accounts from Plaid."""
-    with patch("services.plaid_service.plaid_api.PlaidApi") as MockPlaidApi:
-        mock_client = MockPlaidApi.return_value
-        mock_client.accounts_get.return_value = {
+@pytest.fixture(scope="module")
+def service(mock_plaid_api):
+    """Share one PlaidService, built against the mocked client."""
+    return PlaidService()
+
+
+@pytest.fixture
+def plaid_client(mock_plaid_api, service):
+    """Give each test a clean mock client and an empty accounts cache."""
+    mock_plaid_api.reset_mock(return_value=True, side_effect=True)
+    service._accounts_responses.clear()
+    yield mock_plaid_api
+
+
+# (client method, mock response, service call, expected result) for the
+# calls that map one Plaid response straight to one return value
+PLAID_API_CASES = [
+    pytest.param(
+        "link_token_create",
+        {"link_token": "link-test-token"},
+        lambda service: service.create_link_token(user_id="test-user"),
+        "link-test-token",
+        id="create_link_token",
+    ),
+    pytest.param(
+        "item_public_token_exchange",
+        {"access_token": "access-test-token", "item_id": "item-123"},
+        lambda service: service.exchange_public_token("public-token"),
+        ("access-test-token", "item-123"),
+        id="exchange_public_token",
+    ),
+    pytest.param(
+        "accounts_get",
+        {
             "accounts": [
                 {
                     "account_id": "acc-123",
@@ -52,130 +104,230 @@ async def test_get_accounts():
                     "official_name": "Chase Freedom",
                 }
             ]
-        }
+        },
+        lambda service: service.get_accounts("access-token"),
+        [
+            {
+                "plaid_account_id": "acc-123",
+                "account_name": "Chase Credit Card",
+                "account_type": "credit",
+                "account_subtype": "credit card",
+                "mask": "1234",
+                "official_name": "Chase Freedom",
+            }
+        ],
+        id="get_accounts",
+    ),
+    pytest.param(
+        "accounts_get",
+        {"accounts": [], "item": {"institution_id": "ins_3"}},
+        lambda service: service.get_institution_name("access-token"),
+        "ins_3",
+        id="get_institution_name",
+    ),
+]
+
 
-        service = PlaidService()
-        accounts = await service.get_accounts("access-token")
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method,response,call,expected", PLAID_API_CASES)
+async def test_plaid_api(service, plaid_client, method, response, call, expected):
+    """Test service calls that wrap a single Plaid API request."""
+    getattr(plaid_client, method).return_value = response
 
-        assert len(accounts) == 1
-        assert accounts[0]["plaid_account_id"] == "acc-123"
-        assert accounts[0]["account_name"] == "Chase Credit Card"
-        assert accounts[0]["account_type"] == "credit"
+    result = await call(service)
+
+    assert result == expected
+    getattr(plaid_client, method).assert_called_once()
 
 
 @pytest.mark.asyncio
-async def test_sync_transactions_pagination():
+@pytest.mark.parametrize("page_size,pages", PAGINATION_CASES)
+async def test_sync_transactions_pagination(service, plaid_client, page_size, pages):
     """Test syncing transactions with pagination."""
-    with patch("services.plaid_service.plaid_api.PlaidApi") as MockPlaidApi:
-        mock_client = MockPlaidApi.return_value
+    # Simulate pagination: a full first page, then the remainder
+    plaid_client.transactions_get.side_effect = pages
 
-        # Simulate pagination: first call returns 500 transactions, second returns 250
-        mock_client.transactions_get.side_effect = [
-            {
-                "transactions": [
-                    {
-                        "transaction_id": f"txn-{i}",
-                        "account_id": "acc-123",
-                        "amount": 50.0 + i,
-                        "date": "2024-01-15",
-                        "merchant_name": f"Merchant {i}",
-                        "name": f"Purchase {i}",
-                        "category": ["Food and Drink"],
-                        "pending": False,
-                    }
-                    for i in range(500)
-                ],
-                "total_transactions": 750,
-            },
-            {
-                "transactions": [
-                    {
-                        "transaction_id": f"txn-{i}",
-                        "account_id": "acc-123",
-                        "amount": 50.0 + i,
-                        "date": "2024-01-16",
-                        "merchant_name": f"Merchant {i}",
-                        "name": f"Purchase {i}",
-                        "category": ["Food and Drink"],
-                        "pending": False,
-                    }
-                    for i in range(500, 750)
-                ],
-                "total_transactions": 750,
-            },
-        ]
-
-        service = PlaidService()
+    with patch("services.plaid_service.PAGE_SIZE", page_size):
         transactions = await service.sync_transactions(
             "access-token",
             start_date=datetime(2024, 1, 1),
             end_date=datetime(2024, 1, 31),
         )
 
-        assert len(transactions) == 750
-        assert mock_client.transactions_get.call_count == 2
+    calls = plaid_client.transactions_get.mock_calls
+    assert len(transactions) == pages[0]["total_transactions"]
+    assert [call.args[0].options.offset for call in calls] == [0, page_size]
+
+
+class _FrozenDatetime(datetime):
+    """datetime whose now() is pinned so default date ranges are exact."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 6, 15, 12, 0)
 
 
 @pytest.mark.asyncio
-async def test_sync_transactions_default_24_months():
+async def test_sync_transactions_default_24_months(service, plaid_client, monkeypatch):
     """Test that sync defaults to 24 months if no dates provided."""
-    with patch("services.plaid_service.plaid_api.PlaidApi") as MockPlaidApi:
-        mock_client = MockPlaidApi.return_value
-        mock_client.transactions_get.return_value = {
-            "transactions": [],
-            "total_transactions": 0,
-        }
+    monkeypatch.setattr("services.plaid_service.datetime", _FrozenDatetime)
+    plaid_client.transactions_get.return_value = {
+        "transactions": [],
+        "total_transactions": 0,
+    }
+
+    transactions = await service.sync_transactions("access-token")
+
+    calls = plaid_client.transactions_get.mock_calls
+    assert transactions == []
+    assert len(calls) == 1
+    request = calls[0].args[0]
 
-        service = PlaidService()
-        transactions = await service.sync_transactions("access-token")
+    # The range ends today and starts exactly 730 days (24 months) earlier
+    assert request.end_date == date(2024, 6, 15)
+    assert (request.end_date - request.start_date).days == 730
 
-        # Check that transactions_get was called
-        assert mock_client.transactions_get.called
 
-        # Get the actual call arguments
-        call_args = mock_client.transactions_get.call_args[0][0]
+@pytest.mark.asyncio
+async def test_sync_transactions_with_account_filter(service, plaid_client):
+    """Test syncing transactions for specific accounts."""
+    plaid_client.transactions_get.return_value = {
+        "transactions": [
+            {
+                "transaction_id": "txn-1",
+                "account_id": "acc-123",
+                "amount": 50.0,
+                "date": "2024-01-15",
+                "merchant_name": "Merchant 1",
+                "name": "Purchase",
+                "category": ["Shopping"],
+                "pending": False,
+            }
+        ],
+        "total_transactions": 1,
+    }
 
-        # Verify date range is approximately 24 months
-        start_date = call_args.start_date
-        end_date = call_args.end_date
+    transactions = await service.sync_transactions(
+        "access-token",
+        start_date=datetime(2024, 1, 1),
+        end_date=datetime(2024, 1, 31),
+        account_ids=["acc-123"],
+    )
 
-        # Calculate difference (should be around 730 days / 24 months)
-        date_diff = (end_date - start_date).days
-        assert 720 <= date_diff <= 740  # Allow small variance
+    assert len(transactions) == 1
+    assert transactions[0]["plaid_account_id"] == "acc-123"
+
+    # Verify account_ids filter was passed
+    calls = plaid_client.transactions_get.mock_calls
+    assert len(calls) == 1
+    assert getattr(calls[0].args[0].options, "account_ids", None) == ["acc-123"]
 
 
 @pytest.mark.asyncio
-async def test_sync_transactions_with_account_filter():
-    """Test syncing transactions for specific accounts."""
-    with patch("services.plaid_service.plaid_api.PlaidApi") as MockPlaidApi:
-        mock_client = MockPlaidApi.return_value
-        mock_client.transactions_get.return_value = {
+async def test_iter_transactions_fetches_pages_concurrently_in_order(service, plaid_client):
+    """Test that later pages are fetched a bounded window at a time but yielded in order."""
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def transactions_get(request):
+        nonlocal in_flight, max_in_flight
+        offset = request.options.offset
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        # Later pages finish first so ordering has to be restored
+        time.sleep(0.05 if offset == 1 else 0.01)
+        with lock:
+            in_flight -= 1
+        return {
             "transactions": [
                 {
-                    "transaction_id": "txn-1",
+                    "transaction_id": f"txn-{offset}",
                     "account_id": "acc-123",
-                    "amount": 50.0,
+                    "amount": 10.0,
                     "date": "2024-01-15",
-                    "merchant_name": "Merchant 1",
                     "name": "Purchase",
-                    "category": ["Shopping"],
-                    "pending": False,
                 }
             ],
-            "total_transactions": 1,
+            "total_transactions": 6,
         }
 
-        service = PlaidService()
+    plaid_client.transactions_get.side_effect = transactions_get
+
+    with patch("services.plaid_service.PAGE_SIZE", 1), patch(
+        "services.plaid_service.PAGE_FETCH_CONCURRENCY", 2
+    ):
+        pages = []
+        # Prefetch tasks alive whenever a page is handed out
+        prefetched = []
+        async for page in service.iter_transactions(
+            "access-token",
+            start_date=datetime(2024, 1, 1),
+            end_date=datetime(2024, 1, 31),
+        ):
+            pages.append(page)
+            prefetched.append(len(asyncio.all_tasks()) - 1)
+
+    assert [page[0]["external_id"] for page in pages] == [f"txn-{i}" for i in range(6)]
+    assert max_in_flight == 2
+    assert max(prefetched) == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_transactions_refetches_after_short_page(service, plaid_client):
+    """Test that a short page mid-sync neither skips nor duplicates rows nor leaks prefetches."""
+    rows = _page(range(6), "2024-01-15", 6)["transactions"]
+
+    def transactions_get(request):
+        offset = request.options.offset
+        # The page at offset 2 comes back one row short
+        count = 1 if offset == 2 else request.options.count
+        return {"transactions": rows[offset : offset + count], "total_transactions": 6}
+
+    plaid_client.transactions_get.side_effect = transactions_get
+
+    with patch("services.plaid_service.PAGE_SIZE", 2):
         transactions = await service.sync_transactions(
             "access-token",
             start_date=datetime(2024, 1, 1),
             end_date=datetime(2024, 1, 31),
-            account_ids=["acc-123"],
         )
 
-        assert len(transactions) == 1
-        assert transactions[0]["plaid_account_id"] == "acc-123"
+    assert [txn["external_id"] for txn in transactions] == [f"txn-{i}" for i in range(6)]
+    assert asyncio.all_tasks() == {asyncio.current_task()}
+
+
+@pytest.mark.asyncio
+async def test_accounts_and_institution_share_one_request(service, plaid_client):
+    """Test that concurrent account and institution lookups make one Plaid call."""
+    plaid_client.accounts_get.return_value = {
+        "accounts": [
+            {"account_id": "acc-123", "name": "Chase Credit Card", "type": "credit"}
+        ],
+        "item": {"institution_id": "ins_3"},
+    }
+
+    institution_id, accounts = await asyncio.gather(
+        service.get_institution_name("access-token"),
+        service.get_accounts("access-token"),
+    )
+
+    assert institution_id == "ins_3"
+    assert accounts[0]["plaid_account_id"] == "acc-123"
+    plaid_client.accounts_get.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_plaid_retries_rate_limited_calls(service, plaid_client):
+    """Test that a rate-limited Plaid call is retried and then succeeds."""
+    plaid_client.link_token_create.side_effect = [
+        ApiException(status=429, reason="Too Many Requests"),
+        {"link_token": "link-test-token"},
+    ]
+
+    with patch("services.retry.RETRY_MIN_WAIT", 0), patch("services.retry.RETRY_MAX_WAIT", 0):
+        link_token = await service.create_link_token(user_id="test-user")
 
-        # Verify account_ids filter was passed
-        call_args = mock_client.transactions_get.call_args[0][0]
-        assert hasattr(call_args.options, "account_ids")
+    assert link_token == "link-test-token"
+    assert plaid_client.link_token_create.call_count == 2
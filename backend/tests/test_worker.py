@@ -0,0 +1,42 @@
+"""Tests for the Celery worker tasks."""
+import asyncio
+from services.cache import CacheService, cache
+from worker import categorize_transactions_task
+
+
+class _LoopBoundClient:
+    """Fake Redis client that, like redis-py, only works on the loop it first used."""
+
+    def __init__(self, increments):
+        self.loop = None
+        self.increments = increments
+
+    async def incr(self, key):
+        loop = asyncio.get_running_loop()
+        self.loop = self.loop or loop
+        if loop is not self.loop:
+            raise RuntimeError("attached to a different loop")
+        self.increments.append(key)
+
+    async def aclose(self):
+        pass
+
+
+def test_categorize_task_can_run_twice(monkeypatch):
+    """Test that each task run gets a cache client usable from its own event loop."""
+    increments = []
+    monkeypatch.setattr(
+        CacheService, "_connect", staticmethod(lambda url: _LoopBoundClient(increments))
+    )
+    monkeypatch.setattr(cache, "url", "redis://localhost:6379/0")
+    monkeypatch.setattr(cache, "client", _LoopBoundClient(increments))
+
+    async def categorize(transaction_ids, user_id):
+        await cache.incr(f"analytics_version:{user_id}")
+
+    monkeypatch.setattr("api.routes.ai.categorize_transactions_background", categorize)
+
+    categorize_transactions_task(["txn-1"], "user-1")
+    categorize_transactions_task(["txn-2"], "user-1")
+
+    assert increments == ["analytics_version:user-1"] * 2
@@ -0,0 +1,35 @@
+"""Celery worker for long-running background jobs.
+
+Start with: celery -A worker worker --loglevel=info
+"""
+from celery import Celery
+from typing import List
+from config import settings
+import asyncio
+
+celery_app = Celery(
+    "finance_ai",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
+)
+
+
+@celery_app.task(name="categorize_transactions")
+def categorize_transactions_task(transaction_ids: List[str], user_id: str):
+    """Categorize transactions with the LLM on a dedicated worker."""
+    asyncio.run(_categorize_transactions(transaction_ids, user_id))
+
+
+async def _categorize_transactions(transaction_ids: List[str], user_id: str):
+    """Run the categorization job, then release connections bound to this event loop."""
+    from api.routes.ai import categorize_transactions_background
+    from database import engine
+    from services.cache import cache
+    from services.llm.factory import close_llm_providers
+
+    try:
+        await categorize_transactions_background(transaction_ids, user_id)
+    finally:
+        await engine.dispose()
+        await close_llm_providers()
+        await cache.reset()